@@ -1,6 +1,19 @@
-from .analyzer import AudioAnalyzer
-from .bpm_detector import BPMDetector
-from .key_detector import KeyDetector
-# from .genre_classifier import GenreClassifier  # Uncomment if implemented
+import importlib
 
-__all__ = ["AudioAnalyzer", "BPMDetector", "KeyDetector"]
+# The detectors import librosa, so they are loaded on first access. Importing the package for
+# its cache module (the GUI's tag readers do) then stays cheap.
+_EXPORTS = {
+    "AudioAnalyzer": ".analyzer",
+    "get_analyzer": ".analyzer",
+    "BPMDetector": ".bpm_detector",
+    "KeyDetector": ".key_detector",
+    # "GenreClassifier": ".genre_classifier",  # Uncomment if implemented
+}
+
+__all__ = ["AudioAnalyzer", "get_analyzer", "BPMDetector", "KeyDetector"]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
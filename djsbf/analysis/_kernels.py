@@ -0,0 +1,50 @@
+"""
+Numba kernels for the analysis hot paths.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, fastmath=True)
+def key_corrs(chroma, major_tmpl, minor_tmpl):
+    """
+    Scores a 12xT chromagram against centered, unit-norm key templates.
+
+    Sums chroma over time, centers and normalizes the resulting 12-vector, and returns
+    the 24 Pearson correlations (12 major then 12 minor). Returns an empty array when the
+    chroma is flat (e.g. silence), since no key can be inferred from it.
+    """
+    n_pitches, n_frames = chroma.shape
+    v = np.zeros(n_pitches, dtype=np.float32)
+    for p in range(n_pitches):
+        acc = 0.0
+        for t in range(n_frames):
+            acc += chroma[p, t]
+        v[p] = acc
+
+    mean = v.sum() / n_pitches
+    norm = 0.0
+    for p in range(n_pitches):
+        v[p] -= mean
+        norm += v[p] * v[p]
+    if norm == 0.0:
+        return np.empty(0, dtype=np.float32)
+    v /= np.sqrt(norm)
+
+    out = np.empty(2 * n_pitches, dtype=np.float32)
+    for k in range(n_pitches):
+        major = 0.0
+        minor = 0.0
+        for p in range(n_pitches):
+            major += major_tmpl[k, p] * v[p]
+            minor += minor_tmpl[k, p] * v[p]
+        out[k] = major
+        out[n_pitches + k] = minor
+    return out
+
+
+# Compile on import so the first analyzed track doesn't pay for JIT compilation.
+key_corrs(np.ones((12, 4), dtype=np.float32),
+          np.eye(12, dtype=np.float32),
+          np.eye(12, dtype=np.float32))
@@ -6,15 +6,24 @@ The AudioAnalyzer performs analysis on an AudioFile instance:
   - BPM analysis (using a beat-tracking algorithm).
   - Key analysis (using a Krumhansl–Schmuckler style approach).
 
+Both detectors share a single AnalysisContext, so the STFT and onset envelope
+are computed once per file rather than once per detector. For long files the
+context can be built block by block from a stream instead of a decoded array.
+
 It reports progress via a progress_callback, which (if provided) is called at the completion
 of each analysis step (progress as a percentage: 50% after BPM, 100% after Key).
 """
 
 import numpy as np
+import librosa
+import soundfile as sf
+import soxr
+from functools import partial
 from .bpm_detector import BPMDetector
-from .key_detector import KeyDetector
+from .key_detector import KeyDetector, compute_chroma, chroma_from_power, cqt_chroma
 from dataclasses import dataclass
 from djsbf.utils.logger import get_logger
+import djsbf.config as config
 from djsbf.dataclass.audio_file import AudioFile
 from djsbf.dataclass.key import Key
 
@@ -25,6 +34,125 @@ class AudioAnalysisResult:
     BPM: float
     Key: Key
 
+def prepare_audio(audio_data, sample_rate):
+    """
+    Returns audio_data as mono float32 at config.SAMPLE_RATE, with its sample rate.
+    Audio loaded with AudioFile.load_audio(sr=config.SAMPLE_RATE) is already in this form and is returned as-is;
+    anything else (e.g. native-rate audio loaded for playback) is converted once here
+    so both detectors share the same buffer.
+    """
+    y = np.asarray(audio_data)
+    if y.ndim == 2:
+        y = y.mean(axis=0, dtype=np.float32)
+    # Contiguous float32 keeps librosa's FFTs from upcasting or copying a strided view.
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    if sample_rate != config.SAMPLE_RATE:
+        y = librosa.resample(y, orig_sr=sample_rate, target_sr=config.SAMPLE_RATE,
+                             res_type=config.RESAMPLE_TYPE)
+        sample_rate = config.SAMPLE_RATE
+    return y, sample_rate
+
+@dataclass
+class AnalysisContext:
+    """
+    Spectral features shared by the BPM and Key detectors.
+    """
+    sr: int
+    onset_env: np.ndarray
+    chroma: np.ndarray
+
+    @staticmethod
+    def _features(audio_data, power, sample_rate, hop_length=512):
+        """
+        Derives the onset envelope and chromagram from one power spectrogram of audio_data,
+        matching what beat tracking and chroma_stft would each compute from the waveform.
+        The key only needs the time-averaged chroma, so the chromagram is computed on every
+        n-th frame, giving the frame rate of config.KEY_CHROMA_HOP. With the "cqt" chroma
+        method the chromagram is computed from audio_data instead.
+        """
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=power, sr=sample_rate))
+        onset_env = librosa.onset.onset_strength(S=mel_db, sr=sample_rate)
+        if config.KEY_CHROMA_METHOD == "cqt":
+            chroma = compute_chroma(audio_data, sample_rate)
+        else:
+            chroma_step = max(1, config.KEY_CHROMA_HOP // hop_length)
+            chroma = chroma_from_power(power[:, ::chroma_step], sample_rate)
+        return onset_env, chroma
+
+    @classmethod
+    def from_audio(cls, audio_data, sample_rate):
+        """
+        Computes a single STFT of audio_data and derives all features from it.
+        """
+        power = np.abs(librosa.stft(audio_data)) ** 2
+        onset_env, chroma = cls._features(audio_data, power, sample_rate)
+        return cls(sr=sample_rate, onset_env=onset_env, chroma=chroma)
+
+    @classmethod
+    def from_stream(cls, file_path, offset=0.0, duration=None, block_duration=10.0):
+        """
+        Builds the features from block_duration-second blocks of the file, so the decoded
+        window is never held in memory at once. The blocks go through one streaming resampler
+        to config.SAMPLE_RATE and the samples left over after each block's last full frame are
+        carried into the next, so the STFT runs on a single 2048/512 frame grid with no seams.
+        The onset envelope is computed once, from the mel spectrogram of the whole window
+        (a small fraction of the audio's size), so block boundaries don't reset its lag
+        differences either. With the "cqt" chroma method, whose filters span far more than a
+        block boundary, the window is also streamed down to config.KEY_CQT_SAMPLE_RATE and the
+        chromagram is computed once on it. Windows too short for one frame fall back to from_audio.
+        """
+        n_fft, hop_length = 2048, 512
+        sample_rate = config.SAMPLE_RATE
+        chroma_step = max(1, config.KEY_CHROMA_HOP // hop_length)
+        # Same soxr quality as loading; the streaming resampler exists only for soxr.
+        quality = config.RESAMPLE_TYPE if config.RESAMPLE_TYPE.startswith("soxr") else "soxr_hq"
+        cqt = config.KEY_CHROMA_METHOD == "cqt"
+        if cqt:
+            cqt_resampler = soxr.ResampleStream(sample_rate, config.KEY_CQT_SAMPLE_RATE, 1,
+                                                dtype="float32", quality=quality)
+        mel_blocks, chroma_blocks, cqt_blocks = [], [], []
+        carry = np.zeros(0, dtype=np.float32)
+        n_frames_total = 0
+
+        def consume(samples, last=False):
+            nonlocal carry, n_frames_total
+            if cqt:
+                cqt_blocks.append(cqt_resampler.resample_chunk(samples, last=last))
+            buf = np.concatenate((carry, samples)) if len(carry) else samples
+            n_frames = 1 + (len(buf) - n_fft) // hop_length if len(buf) >= n_fft else 0
+            if n_frames:
+                framed = buf[:(n_frames - 1) * hop_length + n_fft]
+                power = np.abs(librosa.stft(framed, n_fft=n_fft, hop_length=hop_length, center=False)) ** 2
+                mel_blocks.append(librosa.feature.melspectrogram(S=power, sr=sample_rate))
+                if not cqt:
+                    # Keep every chroma_step-th frame of the whole window, not of each block.
+                    first = -n_frames_total % chroma_step
+                    if first < n_frames:
+                        chroma_blocks.append(chroma_from_power(power[:, first::chroma_step], sample_rate))
+                n_frames_total += n_frames
+                buf = buf[n_frames * hop_length:]
+            carry = np.array(buf, dtype=np.float32)
+
+        with sf.SoundFile(file_path) as f:
+            native_rate = f.samplerate
+            start = min(int(offset * native_rate), f.frames)
+            f.seek(start)
+            frames = f.frames - start if duration is None else min(int(duration * native_rate), f.frames - start)
+            resampler = soxr.ResampleStream(native_rate, sample_rate, 1, dtype="float32", quality=quality)
+            block_size = max(1, int(block_duration * native_rate))
+            for block in f.blocks(blocksize=block_size, frames=frames, dtype="float32", always_2d=True):
+                mono = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1, dtype=np.float32)
+                consume(resampler.resample_chunk(np.ascontiguousarray(mono)))
+            consume(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True), last=True)
+
+        if not n_frames_total:
+            # Nothing was framed, so carry still holds the whole window.
+            return cls.from_audio(carry, sample_rate)
+        mel_db = librosa.power_to_db(np.concatenate(mel_blocks, axis=1))
+        onset_env = librosa.onset.onset_strength(S=mel_db, sr=sample_rate)
+        chroma = cqt_chroma(np.concatenate(cqt_blocks)) if cqt else np.concatenate(chroma_blocks, axis=1)
+        return cls(sr=sample_rate, onset_env=onset_env, chroma=chroma)
+
 class AudioAnalyzer:
     def __init__(self):
         """
@@ -33,29 +161,52 @@ class AudioAnalyzer:
         self.bpm_detector = BPMDetector()
         self.key_detector = KeyDetector()
 
-    def analyze(self, audio_file: AudioFile, progress_callback=None) -> AudioAnalysisResult:
+    def analyze(self, audio_file: AudioFile, progress_callback=None, audio_data=None,
+                context: AnalysisContext = None) -> AudioAnalysisResult:
         """
         Analyzes audio_file for BPM and Key.
         
         Parameters:
           audio_file: an instance of AudioFile.
           progress_callback: Optional function that accepts a numeric percentage (0-100).
+          audio_data: Optional samples to analyze instead of audio_file.audio_data
+                      (e.g. a decoded analysis window).
+          context: Optional precomputed AnalysisContext (e.g. from AnalysisContext.from_stream);
+                   when given, no audio is loaded.
         
         This method calls the appropriate detectors and returns an AudioAnalysisResult instance.
         """
         logger.info("Starting analysis on file: %s", audio_file.file_path)
-        if audio_file.audio_data is None:
-            audio_file.load_audio()
+        if context is None:
+            if audio_data is None:
+                if audio_file.audio_data is None:
+                    audio_file.load_audio(sr=config.SAMPLE_RATE)
+                audio_data = audio_file.audio_data
+            audio_data, sample_rate = prepare_audio(audio_data, audio_file.sample_rate)
+            context = AnalysisContext.from_audio(audio_data, sample_rate)
         results = {}
         # List of analysis tasks: each tuple is (task_name, analysis_function)
-        tasks = [("BPM", self.bpm_detector.detect_bpm),
-                 ("Key", self.key_detector.detect_key)]
+        tasks = [("BPM", partial(self.bpm_detector.detect_bpm, onset_env=context.onset_env)),
+                 ("Key", partial(self.key_detector.detect_key, chroma=context.chroma))]
         total_tasks = len(tasks)
         for i, (task, func) in enumerate(tasks):
-            result = func(audio_file.audio_data, audio_file.sample_rate)
+            result = func(audio_data, context.sr)
             results[task] = result
             if progress_callback:
                 # Update progress: evenly distribute progress among tasks.
                 progress_callback((i + 1) * 100 / total_tasks)
         logger.info("Completed analysis on file: %s", audio_file.file_path)
         return AudioAnalysisResult(BPM=results["BPM"], Key=results["Key"])
+
+
+_analyzer = None
+
+def get_analyzer() -> AudioAnalyzer:
+    """
+    Returns the AudioAnalyzer shared by every analysis in this process, creating it on first
+    use so the detectors (and their key templates) are built once per process, not per file.
+    """
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = AudioAnalyzer()
+    return _analyzer
@@ -0,0 +1,107 @@
+"""
+Analysis Cache Module
+=====================
+
+Persists BPM and Key results in a SQLite database so files that haven't changed
+are not re-analyzed. Entries are keyed by absolute path and invalidated when the
+file's modification time or size changes, or when the analysis version (the detector
+version and the settings that affect results) differs.
+"""
+
+import os
+import sqlite3
+import threading
+import djsbf.config as config
+from djsbf.dataclass.key import Key
+from djsbf.enums import Tonic, Mode
+from djsbf.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bump when a detector changes in a way that changes its results.
+ANALYSIS_VERSION = 1
+
+# Settings that change analysis results. An entry computed under other values is not reused.
+_VERSIONED_SETTINGS = ("SAMPLE_RATE", "RESAMPLE_TYPE", "ANALYSIS_WINDOW_S", "BPM_BACKEND",
+                       "KEY_CHROMA_METHOD", "KEY_CQT_SAMPLE_RATE", "KEY_CHROMA_N_FFT", "KEY_CHROMA_HOP")
+
+# Stored as PRAGMA user_version; databases written with another layout are rebuilt.
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+    path TEXT PRIMARY KEY,
+    mtime INTEGER,
+    size INTEGER,
+    version TEXT,
+    bpm REAL,
+    key_tonic TEXT,
+    key_mode TEXT,
+    camelot TEXT
+)
+"""
+
+# One connection per thread: sqlite3 connections can't be shared between threads, and
+# opening one (plus the schema checks) for every lookup is far slower than the lookup itself.
+_local = threading.local()
+
+def _analysis_version():
+    """Returns the version string stored with each result: the detector version and the settings it ran with."""
+    return ";".join([str(ANALYSIS_VERSION)] + [f"{name}={getattr(config, name, None)}" for name in _VERSIONED_SETTINGS])
+
+def _connect():
+    """Returns this thread's connection to the cache, opening it and creating the schema on first use."""
+    path = config.ANALYSIS_CACHE_PATH
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == path:
+        return conn
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    # WAL lets the analysis worker processes read and write concurrently.
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            # Only cached results are lost; they are recomputed on the next analysis.
+            conn.execute("DROP TABLE IF EXISTS analysis")
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.execute(_SCHEMA)
+    _local.conn, _local.path = conn, path
+    return conn
+
+def get(path, stat):
+    """
+    Returns the cached (bpm, Key) for path if stat (an os.stat_result) still matches
+    the cached entry and it was computed with the current analysis version, otherwise None.
+    """
+    try:
+        row = _connect().execute(
+            "SELECT bpm, key_tonic, key_mode FROM analysis WHERE path = ? AND mtime = ? AND size = ? AND version = ?",
+            (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, _analysis_version())).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("Error reading analysis cache: %s", e)
+        return None
+    if row is None:
+        return None
+    bpm, tonic, mode = row
+    key = Key(tonic=Tonic(tonic), mode=Mode(mode)) if tonic else None
+    logger.debug("Analysis cache hit for file: %s", path)
+    return bpm, key
+
+def put(path, stat, bpm, key):
+    """
+    Stores the analysis result for path, replacing any previous entry.
+    """
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, _analysis_version(), float(bpm),
+                 key.tonic.value if key else None,
+                 key.mode.value if key else None,
+                 key.camelot.value if key else None))
+    except sqlite3.Error as e:
+        logger.warning("Error writing analysis cache: %s", e)
@@ -1,57 +1,94 @@
 import numpy as np
 import librosa
+from functools import lru_cache
+from scipy.linalg import circulant
 from djsbf.utils.logger import get_logger
+import djsbf.config as config
 from djsbf.enums import Tonic, Mode
 from djsbf.dataclass.audio_file import AudioFile
 from djsbf.dataclass.key import Key
+from ._kernels import key_corrs
+
+def compute_chroma(audio_data, sample_rate):
+    """
+    Computes the chromagram used for key detection, as selected by config.KEY_CHROMA_METHOD.
+    "cqt" resamples to config.KEY_CQT_SAMPLE_RATE and uses a constant-Q chromagram, whose
+    log-spaced bins resolve low notes far better than an STFT; "stft" uses chroma_stft.
+    """
+    if config.KEY_CHROMA_METHOD == "cqt":
+        y = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=config.KEY_CQT_SAMPLE_RATE,
+                             res_type=config.RESAMPLE_TYPE)
+        return cqt_chroma(y)
+    return librosa.feature.chroma_stft(y=audio_data, sr=sample_rate,
+                                       n_fft=config.KEY_CHROMA_N_FFT,
+                                       hop_length=config.KEY_CHROMA_HOP)
+
+def cqt_chroma(y):
+    """Constant-Q chromagram of y, which must already be at config.KEY_CQT_SAMPLE_RATE."""
+    return librosa.feature.chroma_cqt(y=y, sr=config.KEY_CQT_SAMPLE_RATE, hop_length=config.KEY_CHROMA_HOP)
+
+@lru_cache(maxsize=None)
+def _chroma_filter(sample_rate, n_fft, tuning):
+    """
+    Returns the (12, n_fft // 2 + 1) matrix folding STFT bins into pitch classes.
+    Building it takes far longer than applying it, and estimate_tuning only returns
+    multiples of 0.01, so each (rate, size, tuning) is built once per process.
+    """
+    return librosa.filters.chroma(sr=sample_rate, n_fft=n_fft, tuning=tuning)
+
+def chroma_from_power(power, sample_rate):
+    """
+    Same as librosa.feature.chroma_stft(S=power, sr=sample_rate), with the pitch-class
+    filter bank reused across calls instead of rebuilt for every file and stream block.
+    """
+    n_fft = 2 * (power.shape[0] - 1)
+    tuning = float(librosa.estimate_tuning(S=power, sr=sample_rate, bins_per_octave=12))
+    return librosa.util.normalize(_chroma_filter(sample_rate, n_fft, tuning) @ power, norm=np.inf, axis=0)
+
+def _build_templates(profile):
+    """
+    Returns a 12x12 matrix whose rows are the rotations of profile,
+    mean-centered and normalized to unit length.
+    """
+    # Row i of the transposed circulant is np.roll(profile, i).
+    templates = circulant(profile).T
+    templates = templates - templates.mean(axis=1, keepdims=True)
+    templates = templates / np.linalg.norm(templates, axis=1, keepdims=True)
+    # float32 matches librosa's chroma dtype, so scoring never upcasts.
+    return templates.astype(np.float32)
+
+# Key templates based on Krumhansl’s experiments, normalized to sum to 1.
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09,
+                          2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53,
+                          2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+MAJOR_PROFILE /= MAJOR_PROFILE.sum()
+MINOR_PROFILE /= MINOR_PROFILE.sum()
+
+# Every rotation of each profile (row i is the template for tonic i), centered and scaled
+# to unit norm so a single pass yields Pearson correlations. Built once at import.
+MAJOR_TEMPLATES = _build_templates(MAJOR_PROFILE)
+MINOR_TEMPLATES = _build_templates(MINOR_PROFILE)
+
+# Tonics in pitch-class order, matching the template rows.
+KEYS = tuple(Tonic)
 
 class KeyDetector:
-    def __init__(self):
-        # Key templates based on Krumhansl’s experiments
-        self.major_profile = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09,
-                                       2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
-        self.minor_profile = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53,
-                                       2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
-        # Normalize the profiles
-        self.major_profile = self.major_profile / np.sum(self.major_profile)
-        self.minor_profile = self.minor_profile / np.sum(self.minor_profile)
-        
-        # List of keys corresponding to each pitch class index.
-        self.keys = list(Tonic)
-    
-    def detect_key(self, audio_data, sample_rate):
-        # Compute a chromagram from the audio signal.
-        chroma = librosa.feature.chroma_stft(y=audio_data, sr=sample_rate)
-        # Average over time to form a single 12-element vector.
-        chroma_mean = np.mean(chroma, axis=1)
-        
-        # Normalize the chroma vector.
-        if np.sum(chroma_mean) > 0:
-            chroma_norm = chroma_mean / np.sum(chroma_mean)
-        else:
-            chroma_norm = chroma_mean
-        
-        best_corr = -np.inf
-        best_key: Tonic = None
-        best_mode: Mode = None  
-        # Loop through all 12 keys
-        for i in range(12):
-            # Rotate (shift) the key templates according to the candidate key.
-            major_rot = np.roll(self.major_profile, i)
-            minor_rot = np.roll(self.minor_profile, i)
-            
-            # Compute correlation between the chroma vector and the rotated templates.
-            corr_major = np.corrcoef(chroma_norm, major_rot)[0, 1]
-            corr_minor = np.corrcoef(chroma_norm, minor_rot)[0, 1]
-            
-            if corr_major > best_corr:
-                best_corr = corr_major
-                best_key = self.keys[i]
-                best_mode = Mode.MAJOR
-            if corr_minor > best_corr:
-                best_corr = corr_minor
-                best_key = self.keys[i]
-                best_mode = Mode.MINOR
-        
+    def detect_key(self, audio_data, sample_rate, chroma=None):
+        # Compute a chromagram from the audio signal, unless a precomputed one is given.
+        if chroma is None:
+            chroma = compute_chroma(audio_data, sample_rate)
+        chroma = np.ascontiguousarray(chroma, dtype=np.float32)
+
+        # Correlate the time-summed chroma against all 24 candidate keys in one fused pass:
+        # major scores first, then minor.
+        scores = key_corrs(chroma, MAJOR_TEMPLATES, MINOR_TEMPLATES)
+        if scores.size == 0:
+            return None
+        best = int(np.argmax(scores))
+        mode_index, tonic_index = divmod(best, 12)
+        best_key: Tonic = KEYS[tonic_index]
+        best_mode: Mode = Mode.MINOR if mode_index else Mode.MAJOR
+
         # Return a dictionary containing the detected key
-        return Key(tonic=best_key, mode=best_mode) if best_key else None
+        return Key(tonic=best_key, mode=best_mode)
@@ -3,20 +3,39 @@ Configuration file for the mxdnkey application.
 Define application-wide settings and tunable parameters here.
 """
 
+import os
+
 # Audio processing settings
 SAMPLE_RATE = 22050    # Default sample rate for loading audio files
+RESAMPLE_TYPE = "soxr_qq"  # Resampler used when loading; soxr_qq is the fastest soxr quality
+
+# Analysis settings
+ANALYSIS_WINDOW_S = 60  # Seconds from the middle of each track used for BPM/Key analysis (None = whole track)
+ANALYSIS_CACHE_PATH = os.path.expanduser("~/.cache/mxdnkey/analysis.sqlite")  # Persistent BPM/Key results
+STREAM_THRESHOLD_S = 600  # Analysis windows longer than this (e.g. whole long mixes) are streamed block by block
 
 # BPM detection parameters
 BPM_BUFFER_SIZE = 4096  # (Optional) Buffer size for beat tracking, adjust as needed
+BPM_BACKEND = "librosa"  # "librosa" or "aubio" (faster C tracker; requires the optional aubio package)
 
 # Key detection parameters
 KEY_DETECTION_THRESHOLD = 0.0  # Placeholder if you want to implement threshold-based key detection
+KEY_CHROMA_METHOD = "cqt"  # "cqt" (constant-Q, more accurate) or "stft" (reuses the shared STFT)
+KEY_CQT_SAMPLE_RATE = 11025  # Key audio is resampled to this rate for the CQT chromagram
+KEY_CHROMA_N_FFT = 4096  # FFT size for the key chromagram (stft method)
+KEY_CHROMA_HOP = 2048    # Hop length for the key chromagram; the key only needs the time-average
 
 # Logging configuration
 LOG_LEVEL = "DEBUG"    # Options: 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'
 
-#Max Analysis Threads
-MAX_ANALYSIS_THREADS = 8
+#Max Analysis Threads (worker processes; more than the CPU count only adds contention)
+MAX_ANALYSIS_THREADS = min(8, os.cpu_count() or 1)
+
+#Max threads reading tags when a folder is opened
+MAX_METADATA_THREADS = 8
+
+#Max threads listing directories or renaming files in a folder (each call blocks on network shares)
+MAX_SCAN_THREADS = 8
 
 #Gif Folder
 GIF_FOLDER = 'djsbf/media'
\ No newline at end of file
@@ -4,15 +4,88 @@ AudioFile Module
 """
 
 import os
+from functools import cached_property
 import mutagen
-import librosa
+from mutagen.asf import ASF
+from mutagen.easyid3 import EasyID3
+from mutagen.easymp4 import EasyMP4
+from mutagen.flac import FLAC
+from mutagen.id3 import ID3
+from mutagen.mp3 import EasyMP3
+from mutagen.oggvorbis import OggVorbis
+from mutagen.wave import WAVE
 import numpy as np
 import re
 from djsbf.utils.logger import get_logger
 from djsbf.dataclass.key import Key
+import djsbf.config as config
 
 logger = get_logger(__name__)
 
+# Expose the ID3 initial key frame (written by Traktor and most DJ software) in easy mode.
+EasyID3.RegisterTextKey("initialkey", "TKEY")
+
+# Traktor marks the files it has analyzed with a private ID3 frame owned by "TRAKTOR4".
+TRAKTOR_PRIV = "PRIV:TRAKTOR4"
+
+
+def _get_traktor_frames(id3, key):
+    frames = id3.getall(TRAKTOR_PRIV)
+    if not frames:
+        raise KeyError(key)
+    return [frame.owner for frame in frames]
+
+
+# Easy mode hides PRIV frames, so expose Traktor's as a read-only "traktor4" key.
+EasyID3.RegisterKey("traktor4", _get_traktor_frames)
+
+# Tag names tried (in order) for each metadata field; lowercase easy keys first, then ID3 frames.
+TAG_ALIASES = {
+    "title": ("title", "TIT2"),
+    "album": ("album", "TALB"),
+    "artist": ("artist", "TPE1"),
+    "genre": ("genre", "TCON"),
+    "bpm": ("bpm", "TBPM"),
+    "initialkey": ("initialkey", "TKEY"),
+}
+
+# Splits a genre tag on commas and whitespace; compiled once instead of per file.
+GENRE_SPLIT = re.compile(r',\s*|\s+')
+
+# Characters that can't appear in a file name on Windows or POSIX, including path separators.
+UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+# Tag readers by extension, matching what mutagen.File(easy=True) picks for these formats
+# without sniffing the file header against every format first.
+TAG_READERS = {
+    ".mp3": EasyMP3,
+    ".flac": FLAC,
+    ".m4a": EasyMP4,
+    ".ogg": OggVorbis,
+    ".wav": WAVE,
+    ".wma": ASF,
+}
+
+
+def analyze_file(audio_file):
+    """
+    Runs the BPM and Key analysis for audio_file and returns (BPM, key).
+    Kept at module level, away from the GUI modules, so a ProcessPoolExecutor worker can
+    unpickle it without importing Tk.
+    """
+    audio_file.analyze()
+    return audio_file.BPM, audio_file.key
+
+
+def init_analysis_worker():
+    """
+    ProcessPoolExecutor initializer: builds the worker's shared analyzer once, as it starts.
+    The analysis stack (librosa, numba kernels) is imported here, so only workers load it.
+    """
+    from djsbf.analysis.analyzer import get_analyzer
+    get_analyzer()
+
+
 class AudioFile:
     title: str
     album: str
@@ -25,8 +98,9 @@ class AudioFile:
     key: Key = None
     traktor_analysis: bool = False
     metadata: mutagen.File
-    audio: np.ndarray = None
+    audio_data: np.ndarray = None
     sample_rate: int = 44100
+    original_sample_rate: int = None
 
     def __init__(self, file_path):
         logger.debug("Initializing AudioFile with path: %s", file_path)
@@ -35,8 +109,19 @@ class AudioFile:
             raise FileNotFoundError(f"{file_path} does not exist.")
 
         self.file_path = file_path.replace("\\", "/")
+        self._tag_cache = {}
         self._load_metadata()
 
+    def __getstate__(self):
+        """
+        Drops the mutagen tag object and any decoded audio when pickling (e.g. to send the
+        file to an analysis worker); the resolved tags in _tag_cache are kept.
+        """
+        state = self.__dict__.copy()
+        state["metadata"] = None
+        state.pop("audio_data", None)
+        return state
+
     def _load_metadata(self):
         """
         Loads metadata from the file using mutagen's easy mode.
@@ -44,100 +129,232 @@ class AudioFile:
         """
         try:
             logger.debug("Loading metadata for file: %s", self.file_path)
-            tag = mutagen.File(self.file_path, easy=True)
+            tag = self._read_tags()
             if tag is None:
                 logger.debug("No metadata found for file: %s", self.file_path)
-                self.metadata = None
-                self.title = self.file_path.split(os.sep)[-1]
-                self.album = "Unknown"
-                self.artist = "Unknown"
-                self.genre = ["Unknown"]
-                logger.debug("Metadata set to default values.")
+                self._set_default_metadata()
             else:
                 self.metadata = tag
-                self.title = self._get_metadata_tag("title", "TIT2")
-                self.album = self._get_metadata_tag("album", "TALB")
-                self.artist = self._get_metadata_tag("artist", "TPE1")
-                self.genre = re.split(r',\s*|\s+', self._get_metadata_tag("genre", "TCON"))
-                self.traktor_analysis = "traktor4" in tag
+                self._tag_cache = self._resolve_tags(tag)
+                self.title = self._get_metadata_tag("title")
+                self.album = self._get_metadata_tag("album")
+                self.artist = self._get_metadata_tag("artist")
+                self.genre = GENRE_SPLIT.split(self._get_metadata_tag("genre"))
+                self.traktor_analysis = self._has_traktor_analysis(tag)
                 logger.debug("Metadata: %s - %s - %s - %s", self.title, self.album, self.artist, self.genre)
                 logger.debug("Metadata successfully loaded.")
             return tag
         except Exception as err:
             logger.exception("Error loading metadata: %s", err)
+            self._set_default_metadata()
             return None
 
-    def load_audio(self):
+    @staticmethod
+    def _has_traktor_analysis(tag):
+        """Returns True if tag carries Traktor's analysis marker."""
+        if isinstance(tag.tags, ID3):
+            # Readers without an easy mode (e.g. WAVE) expose the raw ID3 frames.
+            return bool(tag.tags.getall(TRAKTOR_PRIV))
+        return "traktor4" in tag
+
+    def _read_tags(self):
+        """
+        Opens the file's tags with the reader for its extension. Falls back to mutagen.File's
+        format detection for other extensions or when the extension doesn't match the content
+        (e.g. an Opus stream in a .ogg file).
+        """
+        reader = TAG_READERS.get(os.path.splitext(self.file_path)[1].lower())
+        if reader is not None:
+            try:
+                return reader(self.file_path)
+            except mutagen.MutagenError as e:
+                logger.debug("%s can't read %s (%s); detecting the format", reader.__name__, self.file_path, e)
+        return mutagen.File(self.file_path, easy=True)
+
+    def _set_default_metadata(self):
+        """Fills in placeholder metadata (the file name as title) for files without readable tags."""
+        self.metadata = None
+        self.title = os.path.basename(self.file_path)
+        self.album = "Unknown"
+        self.artist = "Unknown"
+        self.genre = ["Unknown"]
+        logger.debug("Metadata set to default values.")
+
+    @cached_property
+    def safe_target_name(self):
         """
-        Loads the audio data and sample rate using librosa.
+        File name made from the title, with characters not allowed in file names replaced by
+        underscores and the original extension kept. Built once, from the tags read at load.
+        Returns None when the title can't name the file: blank, or the "Unknown" placeholder
+        that every untagged file shares.
         """
+        extension = os.path.splitext(self.file_path)[1]
+        title = (self.title or "").strip()
+        # Files without tags use their file name as the title; don't double the extension.
+        if extension and title.lower().endswith(extension.lower()):
+            title = title[:-len(extension)]
+        title = UNSAFE_FILENAME_CHARS.sub("_", title).strip()
+        if not title or title == "Unknown":
+            return None
+        return title + extension
+
+    def load_audio(self, sr=None):
+        """
+        Loads the audio data as mono at its native sample rate, or resampled to sr if given
+        (analysis passes config.SAMPLE_RATE). The native rate is always stored in
+        original_sample_rate.
+        """
+        # Imported here so that reading tags (e.g. to fill the library table) doesn't pay librosa's import cost.
+        import librosa
         try:
             logger.info("Loading audio data from file: %s", self.file_path)
-            self.audio_data, self.sample_rate = librosa.load(self.file_path, sr=None)
+            audio_data, self.original_sample_rate = self._decode()
+            if sr is not None and sr != self.original_sample_rate:
+                audio_data = librosa.resample(audio_data, orig_sr=self.original_sample_rate, target_sr=sr,
+                                              res_type=config.RESAMPLE_TYPE)
+            self.audio_data = np.ascontiguousarray(audio_data, dtype=np.float32)
+            self.sample_rate = sr or self.original_sample_rate
             self.duration = librosa.get_duration(y=self.audio_data, sr=self.sample_rate)
             logger.debug("Audio loaded with sample rate: %s", self.sample_rate)
         except Exception as e:
             logger.exception("Error loading audio: %s", e)
             raise
 
-    def analyze(self, progress_callback=None):
+    def release_audio(self):
+        """
+        Drops audio_data, the only decoded copy an AudioFile holds, so one kept around, e.g. in
+        the library table, doesn't pin the whole track in memory. Copies made from it, such as
+        the player's int16 buffer, are unaffected. The next load_audio() decodes the file again.
+        """
+        self.audio_data = None
+
+    def _decode(self, offset=0.0, duration=None):
+        """
+        Decodes the file to mono float32 at its native sample rate.
+        Uses soundfile directly for every format libsndfile can read (WAV, FLAC, OGG and,
+        with libsndfile >= 1.1, MP3), falling back to librosa's audioread path otherwise.
+        offset and duration (in seconds) restrict decoding to part of the file.
+        Returns (audio_data, sample_rate).
+        """
+        import soundfile as sf
+        try:
+            with sf.SoundFile(self.file_path) as f:
+                sample_rate = f.samplerate
+                if offset:
+                    f.seek(int(offset * sample_rate))
+                frames = -1 if duration is None else int(duration * sample_rate)
+                data = f.read(frames, dtype='float32', always_2d=True)
+        except Exception as e:
+            import librosa
+            logger.debug("soundfile can't decode %s (%s); falling back to librosa.load", self.file_path, e)
+            return librosa.load(self.file_path, sr=None, mono=True, offset=offset, duration=duration,
+                                dtype=np.float32)
+        if data.shape[1] == 1:
+            return data[:, 0], sample_rate
+        return data.mean(axis=1, dtype=np.float32), sample_rate
+
+    def analyze(self, progress_callback=None, force=False):
         """
         Triggers analysis of audio data for BPM and Key.
         
-        If audio data is not already loaded, it loads it. Then it calls the external
-        Analyzer class to perform analysis, updating the BPM and Key properties.
+        If the file was already analyzed by Traktor, the BPM and Key are read from its tags
+        instead, and if it was analyzed before and hasn't changed since, they come from the
+        analysis cache. Otherwise it loads the audio and calls the external Analyzer class to
+        perform analysis, updating the BPM and Key properties and the cache.
         
         Parameters:
           progress_callback (function): Optional callback receiving progress (0-100).
+          force (bool): Run the analysis even if Traktor tags or a cached result are present.
           
         NOTE: This method does NOT run during __init__; it must be triggered explicitly.
         """
-        self.load_audio()
+        if not force and self.load_previous_analysis():
+            if progress_callback:
+                progress_callback(100)
+            return
 
-        from djsbf.analysis.analyzer import AudioAnalyzer
-        analyzer = AudioAnalyzer()
+        from djsbf.analysis import cache
+        stat = os.stat(self.file_path)
+
+        import librosa
+        from djsbf.analysis.analyzer import AnalysisContext, get_analyzer, prepare_audio
+        analyzer = get_analyzer()
         logger.info("Starting analysis for file: %s", self.file_path)
-        result = analyzer.analyze(self, progress_callback)
+        self.duration = librosa.get_duration(path=self.file_path)
+        window = config.ANALYSIS_WINDOW_S or self.duration
+        offset = max(0.0, (self.duration - window) / 2)
+        if window > config.STREAM_THRESHOLD_S:
+            # Long window: stream it block by block instead of decoding it all at once.
+            logger.debug("Streaming %s s of long file for analysis: %s", window, self.file_path)
+            context = AnalysisContext.from_stream(self.file_path, offset=offset, duration=window)
+            result = analyzer.analyze(self, progress_callback, context=context)
+        else:
+            # Decode only the analysis window; audio_data is left for the player to load if needed.
+            segment, sample_rate = prepare_audio(*self._decode(offset, window))
+            context = AnalysisContext.from_audio(segment, sample_rate)
+            result = analyzer.analyze(self, progress_callback, audio_data=segment, context=context)
         self.key = result.Key
         self.BPM = result.BPM
+        cache.put(self.file_path, stat, self.BPM, self.key)
         logger.info("Analysis complete for file: %s", self.file_path)
 
-    def get_audio_form(self, size):
+    def load_previous_analysis(self):
         """
-        Returns a version of the audio data truncated (or padded) to 'size' samples.
-        Useful for generating a waveform for visualization.
+        Sets BPM and key from an earlier analysis without decoding any audio: Traktor's tags if
+        present, otherwise the analysis cache if the file hasn't changed since it was analyzed.
+        Returns True if one was found.
         """
-        if self.audio_data is None:
-            logger.info("Audio data not loaded; calling load_audio() to generate waveform.")
-            self.load_audio()
-        current_length = len(self.audio_data)
-        if current_length >= size:
-            logger.debug("Truncating audio to %s samples for waveform.", size)
-            return self.audio_data[:size]
-        else:
-            logger.debug("Padding audio to %s samples for waveform.", size)
-            return np.pad(self.audio_data, (0, size - current_length), mode='constant')
+        if self.traktor_analysis and self._load_tagged_analysis():
+            logger.info("Using Traktor analysis for file: %s", self.file_path)
+            return True
+        from djsbf.analysis import cache
+        cached = cache.get(self.file_path, os.stat(self.file_path))
+        if cached is None:
+            return False
+        logger.info("Using cached analysis for file: %s", self.file_path)
+        self.BPM, self.key = cached
+        return True
 
-    def _get_metadata_tag(self, *tag_names):
+    def _load_tagged_analysis(self):
         """
-        Helper to retrieve the first non-empty metadata tag among tag_names.
+        Sets BPM and key from the file's existing tags.
+        Returns True only if both were present and valid.
+        """
+        try:
+            bpm = float(self._get_metadata_tag("bpm"))
+        except ValueError:
+            return False
+        key = Key.from_string(self._get_metadata_tag("initialkey"))
+        if bpm <= 0 or key is None:
+            return False
+        self.BPM = bpm
+        self.key = key
+        return True
+
+    @staticmethod
+    def _resolve_tags(metadata):
+        """
+        Resolves every field in TAG_ALIASES against metadata in a single pass.
         Supports both ID3 tags (e.g., TIT2) and lowercase keys.
-        Returns the tag value as a string or "Unknown" if not found.
+        Returns a dict of field name to the first non-empty tag value, as a string.
         """
-        if self.metadata is None:
-            logger.debug("No metadata available for file: %s", self.file_path)
-            return "Unknown"
-        for tag in tag_names:
-            try:
-                value = self.metadata.get(tag)
+        resolved = {}
+        for field, tag_names in TAG_ALIASES.items():
+            for tag in tag_names:
+                try:
+                    value = metadata.get(tag)
+                except Exception as e:
+                    logger.debug("Error retrieving metadata tag %s: %s", tag, e)
+                    continue
                 if value:
-                    if isinstance(value, list):
-                        logger.debug("Found metadata tag %s: %s", tag, value[0])
-                        return value[0]
-                    else:
-                        logger.debug("Found metadata tag %s: %s", tag, value)
-                        return value
-            except Exception as e:
-                logger.debug("Error retrieving metadata tag %s: %s", tag, e)
-        logger.info("No metadata found among tags: %s", tag_names)
-        return "Unknown"
\ No newline at end of file
+                    # Raw ID3 frames (e.g. from WAVE files) stringify to their text.
+                    resolved[field] = str(value[0] if isinstance(value, list) else value)
+                    break
+        logger.debug("Resolved metadata tags: %s", resolved)
+        return resolved
+
+    def _get_metadata_tag(self, field):
+        """
+        Returns the resolved value of a TAG_ALIASES field, or "Unknown" if the file doesn't have it.
+        """
+        return self._tag_cache.get(field, "Unknown")
@@ -1,5 +1,13 @@
+import re
 from dataclasses import dataclass
-from djsbf.enums.key_enums import Tonic, Mode, CamelotKey, get_camelot_from_tonic_and_mode
+from djsbf.enums.key_enums import Tonic, Mode, CamelotKey, get_camelot_from_tonic_and_mode, get_tonic_and_mode_from_camelot
+
+# Enharmonic spellings that are not members of Tonic.
+_ENHARMONICS = {"DB": "C#", "EB": "D#", "GB": "F#", "AB": "G#", "BB": "A#",
+                "CB": "B", "FB": "E", "E#": "F", "B#": "C"}
+_CAMELOT_PATTERN = re.compile(r"^0?(\d{1,2})([AB])$")
+_OPEN_KEY_PATTERN = re.compile(r"^0?(\d{1,2})([MD])$")
+_MUSICAL_PATTERN = re.compile(r"^([A-G][#B]?)\s*(M|MIN|MINOR|MAJ|MAJOR)?$")
 
 @dataclass
 class Key:
@@ -10,6 +18,33 @@ class Key:
     def __post_init__(self):
         self.camelot = get_camelot_from_tonic_and_mode(self.tonic, self.mode)
 
+    @classmethod
+    def from_string(cls, text: str):
+        """
+        Parses a key tag as written by DJ software: Camelot ("8A"), Open Key ("1m", "1d")
+        or musical notation ("Am", "C#", "Ebm", "F# minor").
+        Returns None if the text is not a recognizable key.
+        """
+        if not text:
+            return None
+        value = text.strip().upper()
+        match = _CAMELOT_PATTERN.match(value)
+        if match and 1 <= int(match.group(1)) <= 12:
+            return cls(*get_tonic_and_mode_from_camelot(CamelotKey(f"{int(match.group(1))}{match.group(2)}")))
+        match = _OPEN_KEY_PATTERN.match(value)
+        if match and 1 <= int(match.group(1)) <= 12:
+            # Open Key is the Camelot wheel shifted by seven positions; m is minor (A), d is major (B).
+            number = (int(match.group(1)) + 6) % 12 + 1
+            letter = "A" if match.group(2) == "M" else "B"
+            return cls(*get_tonic_and_mode_from_camelot(CamelotKey(f"{number}{letter}")))
+        match = _MUSICAL_PATTERN.match(value)
+        if match:
+            # Case is folded above, so a lone "M" suffix means minor (e.g. "Am").
+            mode = Mode.MAJOR if match.group(2) in (None, "MAJ", "MAJOR") else Mode.MINOR
+            tonic = _ENHARMONICS.get(match.group(1), match.group(1))
+            return cls(Tonic(tonic), mode)
+        return None
+
     def __str__(self):
         return f"[{self.tonic} {self.mode}] [{self.camelot}]"
 
@@ -1,3 +1,3 @@
-from .key_enums import Tonic, Mode, CamelotKey, get_camelot_from_tonic_and_mode
+from .key_enums import Tonic, Mode, CamelotKey, get_camelot_from_tonic_and_mode, get_tonic_and_mode_from_camelot
 
-__add__ = ["Tonic", "Mode", "CamelotKey", "get_camelot_from_tonic_and_mode"]
\ No newline at end of file
+__add__ = ["Tonic", "Mode", "CamelotKey", "get_camelot_from_tonic_and_mode", "get_tonic_and_mode_from_camelot"]
\ No newline at end of file
@@ -44,34 +44,37 @@ class CamelotKey(Enum):
     _11B = "11B"
     _12B = "12B"
 
+# Camelot wheel position of every key, built once rather than on every lookup.
+_CAMELOT_BY_KEY = {
+    (Tonic.C, Mode.MAJOR): CamelotKey._8B,
+    (Tonic.C_SHARP, Mode.MAJOR): CamelotKey._3B,
+    (Tonic.D, Mode.MAJOR): CamelotKey._10B,
+    (Tonic.D_SHARP, Mode.MAJOR): CamelotKey._5B,
+    (Tonic.E, Mode.MAJOR): CamelotKey._12B,
+    (Tonic.F, Mode.MAJOR): CamelotKey._7B,
+    (Tonic.F_SHARP, Mode.MAJOR): CamelotKey._2B,
+    (Tonic.G, Mode.MAJOR): CamelotKey._9B,
+    (Tonic.G_SHARP, Mode.MAJOR): CamelotKey._4B,
+    (Tonic.A, Mode.MAJOR): CamelotKey._11B,
+    (Tonic.A_SHARP, Mode.MAJOR): CamelotKey._6B,
+    (Tonic.B, Mode.MAJOR): CamelotKey._1B,
+    (Tonic.C, Mode.MINOR): CamelotKey._5A,
+    (Tonic.C_SHARP, Mode.MINOR): CamelotKey._12A,
+    (Tonic.D, Mode.MINOR): CamelotKey._7A,
+    (Tonic.D_SHARP, Mode.MINOR): CamelotKey._2A,
+    (Tonic.E, Mode.MINOR): CamelotKey._9A,
+    (Tonic.F, Mode.MINOR): CamelotKey._4A,
+    (Tonic.F_SHARP, Mode.MINOR): CamelotKey._11A,
+    (Tonic.G, Mode.MINOR): CamelotKey._6A,
+    (Tonic.G_SHARP, Mode.MINOR): CamelotKey._1A,
+    (Tonic.A, Mode.MINOR): CamelotKey._8A,
+    (Tonic.A_SHARP, Mode.MINOR): CamelotKey._3A,
+    (Tonic.B, Mode.MINOR): CamelotKey._10A,
+}
+_KEY_BY_CAMELOT = {camelot: key for key, camelot in _CAMELOT_BY_KEY.items()}
+
 def get_camelot_from_tonic_and_mode(tonic: Tonic, mode: Mode) -> CamelotKey:
-    if mode == Mode.MAJOR:
-        return {
-            Tonic.C: CamelotKey._8B,
-            Tonic.C_SHARP: CamelotKey._3B,
-            Tonic.D: CamelotKey._10B,
-            Tonic.D_SHARP: CamelotKey._5B,
-            Tonic.E: CamelotKey._12B,
-            Tonic.F: CamelotKey._7B,
-            Tonic.F_SHARP: CamelotKey._2B,
-            Tonic.G: CamelotKey._9B,
-            Tonic.G_SHARP: CamelotKey._4B,
-            Tonic.A: CamelotKey._11B,
-            Tonic.A_SHARP: CamelotKey._6B,
-            Tonic.B: CamelotKey._1B
-        }[tonic]
-    else:
-        return {
-            Tonic.C: CamelotKey._5A,
-            Tonic.C_SHARP: CamelotKey._12A,
-            Tonic.D: CamelotKey._7A,
-            Tonic.D_SHARP: CamelotKey._2A,
-            Tonic.E: CamelotKey._9A,
-            Tonic.F: CamelotKey._4A,
-            Tonic.F_SHARP: CamelotKey._11A,
-            Tonic.G: CamelotKey._6A,
-            Tonic.G_SHARP: CamelotKey._1A,
-            Tonic.A: CamelotKey._8A,
-            Tonic.A_SHARP: CamelotKey._3A,
-            Tonic.B: CamelotKey._10A
-        }[tonic]
\ No newline at end of file
+    return _CAMELOT_BY_KEY[(tonic, mode)]
+
+def get_tonic_and_mode_from_camelot(camelot: CamelotKey) -> tuple[Tonic, Mode]:
+    return _KEY_BY_CAMELOT[camelot]
@@ -1,4 +1,5 @@
 import tkinter as tk
+from PIL import Image, ImageSequence, ImageTk
 from djsbf.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,21 +16,10 @@ class GIFPlayer(tk.Label):
         
     def load_gif(self):
         try:
-            self.gif = tk.PhotoImage(file=self.filepath, format='gif -index 0')
-            self.frames.append(self.gif)
-            
-            # Load all frames from GIF
-            index = 1
-            while True:
-                try:
-                    frame = tk.PhotoImage(
-                        file=self.filepath,
-                        format=f'gif -index {index}'
-                    )
-                    self.frames.append(frame)
-                    index += 1
-                except tk.TclError:
-                    break
+            # Decode the GIF once and convert every frame, instead of re-opening per frame.
+            with Image.open(self.filepath) as im:
+                self.frames = [ImageTk.PhotoImage(frame.copy(), master=self)
+                               for frame in ImageSequence.Iterator(im)]
             
             self.animated = len(self.frames) > 1
             self.config(image=self.frames[0])
@@ -48,7 +48,10 @@ class MainWindow(tk.Tk):
         if folder_path:
             self.gif_player.stop()
             self.withdraw()
-            TableWindow(self, folder_path)
+            table = TableWindow(self, folder_path)
+            # The main window stays hidden, so closing the library has to end the app
+            # (which also stops the library's analysis workers).
+            table.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def on_close(self):
         """Handle window close event"""
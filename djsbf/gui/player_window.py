@@ -6,7 +6,9 @@ BPM, and key adjustments.
 Non-GUI audio processing has been delegated to the AudioProcessor utility.
 """
 
+import atexit
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import tkinter as tk
 from tkinter import messagebox
@@ -21,6 +23,25 @@ from djsbf.dataclass.audio_file import AudioFile
 
 logger = getLogger(__name__)
 
+PROGRESS_REFRESH_MS = 33  # Seek line and time label refresh interval (~30 fps)
+BPM_DEBOUNCE_MS = 150  # The speed-changed buffer is rebuilt once the BPM slider rests this long
+BPM_RANGE_PERCENT = 10  # The BPM slider changes speed by up to this many percent either way
+# Frames per PyAudio callback (~23 ms at 44.1 kHz); fixed so the scratch buffers are sized once.
+FRAMES_PER_BUFFER = 1024
+
+# PortAudio enumerates every device when initialized, so all players share one instance.
+_pa = None
+
+
+def _get_pa():
+    """Returns the process-wide PyAudio instance, creating it on first use."""
+    global _pa
+    if _pa is None:
+        _pa = pyaudio.PyAudio()
+        atexit.register(_pa.terminate)
+    return _pa
+
+
 class PlayerWindow(tk.Toplevel):
     def __init__(self, parent, audio_file: AudioFile):
         """
@@ -36,10 +57,15 @@ class PlayerWindow(tk.Toplevel):
         logger.debug("Initializing PlayerWindow for file: %s", audio_file.file_path)
 
         self.audio_file = audio_file
-        self.pa = pyaudio.PyAudio()
-        self._init_audio_properties()
+        self.pa = _get_pa()
+        if not self._init_audio_properties():
+            return  # The window was already closed after reporting the error.
         self._init_playback_attributes()
         self._init_bpm_and_stretcher()
+        # Playback uses the int16 copy from here on, so the float track isn't kept alongside it.
+        # This drops audio_data from the AudioFile the table shares, so anything else needing it
+        # decodes the file again; reopening the player does that anyway after on_close.
+        self.audio_file.release_audio()
         self.create_widgets()
 
         self.draw_waveform()
@@ -47,19 +73,23 @@ class PlayerWindow(tk.Toplevel):
         self.bind_seek_events()
 
     def _init_audio_properties(self):
-        """Ensure audio data is loaded and set property variables."""
+        """
+        Ensure audio data is loaded and set property variables.
+        Returns False, after showing the error and closing the window, if the audio can't be loaded.
+        """
         if self.audio_file.audio_data is None:
             try:
                 logger.debug("Loading audio data...")
-                self.audio_file.load_audio()
+                self.audio_file.load_audio(sr=None)  # Play at the native rate, never resampled
             except Exception as e:
                 logger.error("Failed to load audio: %s", e)
                 messagebox.showerror("Error", f"Failed to load audio: {str(e)}")
                 self.destroy()
-                return
-        self.original_audio = self.audio_file.audio_data.astype(np.float32)
+                return False
+        self.original_audio = AudioProcessor.to_int16(self.audio_file.audio_data)
         self.sample_rate = self.audio_file.sample_rate
         self.total_duration = len(self.original_audio) / self.sample_rate
+        return True
 
     def _init_playback_attributes(self):
         """Initialize variables used for playback and seeking."""
@@ -70,12 +100,20 @@ class PlayerWindow(tk.Toplevel):
         self.seek_lock = threading.Lock()
         self.modified_audio = None    # Buffer for speed-changed audio
         self.modified_pos = 0
+        # Reused by audio_callback so each callback doesn't allocate new buffers.
+        self._scratch = np.empty(FRAMES_PER_BUFFER, dtype=np.float32)
+        self._out = np.empty(FRAMES_PER_BUFFER, dtype=np.int16)
+        # Speed changes are rebuilt off the Tk thread, one at a time, after the slider settles.
+        self._bpm_after_id = None
+        self._stretch_executor = ThreadPoolExecutor(max_workers=1)
+        self._stretch_buffers = None  # Two slowest-rate-sized buffers, allocated on the first speed change
 
     def _init_bpm_and_stretcher(self):
         """Set BPM and initialize a SimpleTimeStretcher."""
         self.original_bpm = AudioProcessor.get_valid_bpm(self.audio_file)
         self.time_stretcher = SimpleTimeStretcher(self.original_bpm)
         self.current_rate = 1.0
+        self._target_rate = 1.0
 
     def create_widgets(self):
         """Create all GUI components."""
@@ -91,6 +129,11 @@ class PlayerWindow(tk.Toplevel):
         self.figure = plt.Figure(figsize=(8, 2), dpi=100)
         self.ax = self.figure.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.figure, master=self)
+        self._background = None
+        # Pixel-to-data transform for seeking, refreshed with the background on every full draw.
+        self._inv_trans = None
+        # Every full draw (first draw, resize) refreshes the background the seek line is blitted onto.
+        self.canvas.mpl_connect("draw_event", self._on_canvas_draw)
         self.canvas.get_tk_widget().pack(pady=10)
 
     def _create_metadata_display(self):
@@ -126,7 +169,7 @@ class PlayerWindow(tk.Toplevel):
         bpm_frame = tk.Frame(control_frame)
         bpm_frame.pack(side=tk.LEFT, padx=10)
         tk.Label(bpm_frame, text="BPM:").pack(side=tk.LEFT)
-        self.bpm_slider = tk.Scale(bpm_frame, from_=-10, to=10, orient=tk.HORIZONTAL,
+        self.bpm_slider = tk.Scale(bpm_frame, from_=-BPM_RANGE_PERCENT, to=BPM_RANGE_PERCENT, orient=tk.HORIZONTAL,
                                    command=self.update_bpm, resolution=0.1, length=150)
         self.bpm_slider.set(0)
         self.bpm_slider.pack(side=tk.LEFT)
@@ -153,13 +196,19 @@ class PlayerWindow(tk.Toplevel):
         """Draw the full waveform (downsampled for performance) on the Matplotlib canvas."""
         logger.debug("Drawing waveform...")
         self.ax.clear()
-        downsample_factor = max(1, len(self.original_audio) // 10000)
-        self.vis_audio = self.original_audio[::downsample_factor]
-        self.ax.plot(self.vis_audio, alpha=0.5)
-        self.seek_line = self.ax.axvline(0, color='r', linewidth=1)
-        self.ax.set_xlim(0, len(self.vis_audio))
+        # Reduce each block of samples to its min and max so the envelope keeps every peak,
+        # which plain decimation ([::k]) would skip.
+        n = len(self.original_audio)
+        downsample_factor = max(1, n // 10000)
+        blocks = self.original_audio[:n - n % downsample_factor].reshape(-1, downsample_factor)
+        lows, self.vis_audio = blocks.min(axis=1), blocks.max(axis=1)
+        self.ax.fill_between(np.arange(len(self.vis_audio)), lows, self.vis_audio, alpha=0.5, linewidth=0)
+        # The seek line is animated: it is left out of full draws and blitted over a cached background.
+        self.seek_line = self.ax.axvline(0, color='r', linewidth=1, animated=True)
+        # An empty track has no envelope; keep a non-degenerate axis and a usable ratio.
+        self.ax.set_xlim(0, max(1, len(self.vis_audio)))
         self.canvas.draw()
-        self.sample_ratio = len(self.original_audio) / len(self.vis_audio)
+        self.sample_ratio = n / len(self.vis_audio) if len(self.vis_audio) else 1.0
         logger.info("Waveform drawn with sample_ratio: %s", self.sample_ratio)
 
     def start_playback(self):
@@ -168,10 +217,11 @@ class PlayerWindow(tk.Toplevel):
         self.is_playing = True
         self.play_btn.config(text="⏸")
         self.stream = self.pa.open(
-            format=pyaudio.paFloat32,
+            format=pyaudio.paInt16,
             channels=1,
             rate=self.sample_rate,
             output=True,
+            frames_per_buffer=FRAMES_PER_BUFFER,
             stream_callback=self.audio_callback
         )
 
@@ -182,24 +232,36 @@ class PlayerWindow(tk.Toplevel):
         """
         with self.seek_lock:
             if self.modified_audio is not None:
-                end_pos = self.modified_pos + frame_count
-                if end_pos > len(self.modified_audio):
-                    end_pos = len(self.modified_audio)
-                chunk = self.modified_audio[self.modified_pos:end_pos]
-                self.modified_pos = end_pos % len(self.modified_audio)
-                self.current_position = int(self.modified_pos / self.current_rate)
+                buf, pos = self.modified_audio, self.modified_pos
             else:
-                end_pos = self.current_position + frame_count
-                if end_pos > len(self.original_audio):
-                    end_pos = len(self.original_audio)
-                chunk = self.original_audio[self.current_position:end_pos]
-                self.current_position = end_pos % len(self.original_audio)
-
-        # Apply volume control.
-        chunk = chunk * self.volume
-        if len(chunk) < frame_count:
-            chunk = np.pad(chunk, (0, frame_count - len(chunk)), mode='constant')
-        return (chunk.astype(np.float32).tobytes(), pyaudio.paContinue)
+                buf, pos = self.original_audio, self.current_position
+            # Play up to the end of the track, then wrap to its start within the same callback.
+            n = len(buf)
+            pos = min(pos, n)
+            take = min(frame_count, n - pos)
+            head = buf[pos:pos + take]
+            tail = buf[:frame_count - take]
+            new_pos = pos + take if take == frame_count else len(tail)
+            if self.modified_audio is not None:
+                self.modified_pos = new_pos
+                self.current_position = int(new_pos / self.current_rate)
+            else:
+                self.current_position = new_pos
+
+        # Apply volume control; the slider goes up to 2x, so clip instead of letting int16 wrap.
+        if len(self._out) < frame_count:
+            self._scratch = np.empty(frame_count, dtype=np.float32)
+            self._out = np.empty(frame_count, dtype=np.int16)
+        filled = take + len(tail)
+        scratch = self._scratch[:filled]
+        np.multiply(head, self.volume, out=scratch[:take])
+        np.multiply(tail, self.volume, out=scratch[take:])
+        np.clip(scratch, -32768, 32767, out=scratch)
+        out = self._out[:frame_count]
+        out[:filled] = scratch
+        # Only a track shorter than one buffer leaves anything to silence.
+        out[filled:] = 0
+        return (out.tobytes(), pyaudio.paContinue)
 
     def toggle_playback(self):
         """Toggle between play and pause states."""
@@ -220,18 +282,59 @@ class PlayerWindow(tk.Toplevel):
         logger.debug("Volume updated to: %s", self.volume)
 
     def update_bpm(self, value):
-        """Update BPM according to the slider and apply speed change."""
+        """
+        Update the BPM display according to the slider, and schedule the speed change
+        once the slider has rested for BPM_DEBOUNCE_MS.
+        """
         try:
             bpm_change = float(value)
-            self.current_rate = 1.0 + (bpm_change / 100)
-            current_bpm = self.original_bpm * self.current_rate
-            self.bpm_display.config(text=f"{current_bpm:.1f} BPM")
-            # Update modified audio buffer using AudioProcessor.
-            self.modified_audio = AudioProcessor.apply_speed_change(self.original_audio, self.current_rate)
-            self.modified_pos = int(self.current_position * self.current_rate)
-            logger.info("BPM updated: slider_change=%s, current_rate=%s", bpm_change, self.current_rate)
+        except ValueError as e:
+            logger.error("Error updating BPM: %s", e)
+            return
+        self._target_rate = 1.0 + (bpm_change / 100)
+        self.bpm_display.config(text=f"{self.original_bpm * self._target_rate:.1f} BPM")
+        if self._bpm_after_id is not None:
+            self.after_cancel(self._bpm_after_id)
+        self._bpm_after_id = self.after(BPM_DEBOUNCE_MS, self._apply_speed_change, self._target_rate)
+
+    def _apply_speed_change(self, rate):
+        """Builds the speed-changed buffer for rate on the stretch thread."""
+        self._bpm_after_id = None
+        future = self._stretch_executor.submit(self._stretch, rate)
+        future.add_done_callback(lambda f: self._swap_modified_audio(rate, f))
+
+    def _stretch(self, rate):
+        """
+        Returns the audio sped up by rate. Runs on the stretch thread and writes into whichever
+        of the two preallocated buffers isn't playing, so slider changes don't reallocate the track.
+        """
+        if rate == 1.0:
+            return self.original_audio
+        if self._stretch_buffers is None:
+            max_length = int(len(self.original_audio) / (1.0 - BPM_RANGE_PERCENT / 100)) + 1
+            self._stretch_buffers = [np.empty(max_length, dtype=self.original_audio.dtype) for _ in range(2)]
+        first_playing = self.modified_audio is not None and self.modified_audio.base is self._stretch_buffers[0]
+        buffer = self._stretch_buffers[1 if first_playing else 0]
+        length = AudioProcessor.apply_speed_change_into(self.original_audio, rate, buffer)
+        return buffer[:length]
+
+    def _swap_modified_audio(self, rate, future):
+        """
+        Switches playback to a finished speed-changed buffer, unless the slider has moved on
+        since. Runs on the stretch thread; only touches state guarded by seek_lock.
+        """
+        if future.cancelled() or rate != self._target_rate:
+            return
+        try:
+            modified_audio = future.result()
         except Exception as e:
             logger.error("Error updating BPM: %s", e)
+            return
+        with self.seek_lock:
+            self.current_rate = rate
+            self.modified_audio = modified_audio
+            self.modified_pos = int(self.current_position * rate)
+        logger.info("BPM updated: current_rate=%s", rate)
 
     def update_key(self, value):
         """Placeholder for handling key shifting."""
@@ -245,12 +348,26 @@ class PlayerWindow(tk.Toplevel):
         if self.original_audio is not None and self.sample_rate:
             duration = self.total_duration
             current_time = current_pos / self.sample_rate
-            if hasattr(self, "seek_line"):
+            if hasattr(self, "seek_line") and self._background is not None:
                 vis_position = current_pos / self.sample_ratio
                 self.seek_line.set_xdata([vis_position, vis_position])
-                self.canvas.draw_idle()
+                self._blit_seek_line()
             self.time_label.config(text=f"{self.format_time(current_time)} / {self.format_time(duration)}")
-        self.after(10, self.update_progress)
+        self.after(PROGRESS_REFRESH_MS, self.update_progress)
+
+    def _on_canvas_draw(self, event):
+        """Caches the freshly drawn waveform and puts the seek line back on top of it."""
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        # The axis limits and size only change on a full draw, so drags reuse this inverse.
+        self._inv_trans = self.ax.transData.inverted()
+        if hasattr(self, "seek_line"):
+            self.ax.draw_artist(self.seek_line)
+
+    def _blit_seek_line(self):
+        """Redraws only the seek line over the cached waveform instead of the whole figure."""
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.seek_line)
+        self.canvas.blit(self.ax.bbox)
 
     def format_time(self, seconds):
         """Convert seconds to mm:ss format."""
@@ -259,9 +376,12 @@ class PlayerWindow(tk.Toplevel):
         return f"{minutes:02d}:{secs:02d}"
 
     def on_close(self):
-        """Clean up: stop stream, terminate PyAudio, then close the window."""
+        """Clean up: stop stream, then close the window. The shared PyAudio stays open."""
         logger.info("Closing PlayerWindow...")
         self.is_playing = False
+        if self._bpm_after_id is not None:
+            self.after_cancel(self._bpm_after_id)
+        self._stretch_executor.shutdown(wait=False, cancel_futures=True)
         if self.stream:
             try:
                 if self.stream.is_active():
@@ -269,10 +389,8 @@ class PlayerWindow(tk.Toplevel):
                 self.stream.close()
             except Exception as e:
                 logger.error("Error closing stream: %s", e)
-        try:
-            self.pa.terminate()
-        except Exception as e:
-            logger.error("Error terminating PyAudio: %s", e)
+        # The table keeps this AudioFile; drop audio_data in case it was loaded again meanwhile.
+        self.audio_file.release_audio()
         self.destroy()
 
     def on_click_seek(self, event):
@@ -290,8 +408,10 @@ class PlayerWindow(tk.Toplevel):
     def _update_seek_position(self, x_pixel):
         """Convert a canvas x-coordinate to a sample position and update playback."""
         try:
-            # Convert pixel coordinate to data coordinate via Matplotlib transformation
-            x_data = self.ax.transData.inverted().transform((x_pixel, 0))[0]
+            # Convert pixel coordinate to data coordinate via the cached Matplotlib transformation
+            if self._inv_trans is None:
+                self._inv_trans = self.ax.transData.inverted()
+            x_data = self._inv_trans.transform((x_pixel, 0))[0]
             x_data = max(0, min(x_data, len(self.vis_audio)))
             vis_position = int(x_data)
             actual_position = int(vis_position * self.sample_ratio)
@@ -302,18 +422,7 @@ class PlayerWindow(tk.Toplevel):
                 else:
                     self.current_position = actual_position
                     self.modified_pos = int(actual_position * self.current_rate)
+            # A live stream picks the new position up on its next callback; no restart needed.
             logger.debug("Seek position updated: vis=%s, actual=%s", vis_position, actual_position)
-            if self.is_playing:
-                self.restart_playback()
         except Exception as e:
             logger.error("Error updating seek position: %s", e)
-
-    def restart_playback(self):
-        """Restart the audio stream to apply the new seek position."""
-        if self.stream:
-            try:
-                self.stream.stop_stream()
-                self.stream.close()
-            except Exception as e:
-                logger.error("Error restarting playback: %s", e)
-        self.start_playback()
\ No newline at end of file
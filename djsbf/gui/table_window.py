@@ -1,10 +1,14 @@
 import tkinter as tk
 import os
+import multiprocessing
+import queue
+from functools import partial
 import tkinter.messagebox as messagebox
 from tkinter import filedialog, ttk
-import threading
-from djsbf.utils.folder_utils import FolderHandler
-from djsbf.dataclass.audio_file import AudioFile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from djsbf.utils.folder_utils import FolderHandler, rename_noreplace
+from djsbf.gui.player_window import PlayerWindow
+from djsbf.dataclass.audio_file import AudioFile, analyze_file, init_analysis_worker
 from djsbf.enums.key_enums import Tonic, Mode, CamelotKey, get_camelot_from_tonic_and_mode
 from djsbf.utils.logger import get_logger
 
@@ -12,6 +16,33 @@ from djsbf import config
 
 logger = get_logger(__name__)
 
+UI_POLL_MS = 33  # Worker results and row progress are applied to the table ~30 times per second
+PROGRESS_CELLS = 10  # Width of the text progress bar shown in each row
+RENAME_SKIPPED_SHOWN = 10  # File names listed when some renames are refused
+TABLE_HEADERS = ("Index", "Genre", "Artist", "Album", "Title", "Progress", "BPM", "Key", "Camelot", "Player")
+TABLE_COLUMNS = tuple(header.lower() for header in TABLE_HEADERS)
+
+
+def progress_text(value):
+    """Renders a 0-100 progress value as a text bar for a table cell, e.g. '▰▰▰▰▰▱▱▱▱▱ 50%'."""
+    filled = round(value * PROGRESS_CELLS / 100)
+    return "▰" * filled + "▱" * (PROGRESS_CELLS - filled) + f" {value:.0f}%"
+
+
+def _load_audio_file(file_path):
+    """
+    Reads file_path's tags and any earlier analysis (Traktor tags or the analysis cache).
+    Runs on a tag-reader thread, so unchanged files never reach the analysis pool.
+    Returns (audio_file, analyzed).
+    """
+    audio_file = AudioFile(file_path)
+    try:
+        analyzed = audio_file.load_previous_analysis()
+    except OSError as e:
+        logger.debug("No earlier analysis for '%s': %s", file_path, e)
+        analyzed = False
+    return audio_file, analyzed
+
 
 class TableWindow(tk.Toplevel):
     def __init__(self, parent, folder_path):
@@ -19,11 +50,37 @@ class TableWindow(tk.Toplevel):
         self.folder_path = folder_path
         self.title("DJ BF - Library")
         self.geometry(f"{self.winfo_screenwidth()}x{self.winfo_screenheight()}+0+0")
-        self.row_widgets = {}
+        self.row_items = {}
+        self.row_files = {}
+        self.executor = None
+        self.metadata_executor = None
+        self._generation = 0
+        self._total = 0
+        self._remaining = 0
+        self._pending_progress = {}
+        # Worker threads hand results to the Tk loop through this queue instead of calling Tk.
+        self._ui_queue = queue.SimpleQueue()
+        self._drain_id = None
+        self._file_list_cache: dict[str, tuple[dict[str, float], list[str]]] = {}
         
         self.create_widgets()
+        self._drain_ui_queue()
         self.process_files()
 
+    def destroy(self):
+        """Stops pending tag reads and analyses before closing the window."""
+        self._generation += 1
+        self._shutdown_executors()
+        if self._drain_id is not None:
+            self.after_cancel(self._drain_id)
+        super().destroy()
+
+    def _shutdown_executors(self):
+        for executor in (self.metadata_executor, self.executor):
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self.metadata_executor = self.executor = None
+
     def create_widgets(self):
         """Creates buttons and table"""
         # Button frame at top left
@@ -39,10 +96,16 @@ class TableWindow(tk.Toplevel):
             self.button_frame, 
             text="Rename Files",
             state="disabled",
+            command=self.rename_analyzed_files
         )
+        # Overall analysis progress for the folder; rows show their own state as text.
+        self.progress_bar = ttk.Progressbar(self.button_frame, orient="horizontal", mode="determinate", length=200)
+        self.progress_label = tk.Label(self.button_frame, text="")
 
         self.open_folder_btn.grid(row=0, column=0, sticky='nsew', padx=0, pady=0)
         self.rename_files_btn.grid(row=0, column=1, sticky='nsew', padx=0, pady=0)
+        self.progress_bar.grid(row=0, column=2, sticky='ew', padx=10, pady=0)
+        self.progress_label.grid(row=0, column=3, sticky='w', padx=0, pady=0)
 
         
         self.button_frame.grid_columnconfigure(0, weight=1, uniform='buttons')
@@ -60,8 +123,35 @@ class TableWindow(tk.Toplevel):
             self._clear_table()
             self.process_files()
 
-    def rename_files(self, audio_file: AudioFile, camelot: bool = True):
-        """Renames files in the selected folder based on metadata"""
+    def rename_analyzed_files(self):
+        """
+        Renames every successfully analyzed file in the table. Files whose new name is already
+        taken (e.g. two tracks with the same title) are left as they are and listed to the user.
+        """
+        skipped = []
+        for row_index, audio_file in list(self.row_files.items()):
+            try:
+                self.rename_files(row_index, audio_file)
+            except FileExistsError as e:
+                logger.warning("Not renaming file, target already exists: %s -> %s", audio_file.file_path, e.filename2)
+                self.update_row_progress(row_index, 0, "red")
+                skipped.append(os.path.basename(audio_file.file_path))
+        if skipped:
+            shown = "\n".join(skipped[:RENAME_SKIPPED_SHOWN])
+            if len(skipped) > RENAME_SKIPPED_SHOWN:
+                shown += f"\n... and {len(skipped) - RENAME_SKIPPED_SHOWN} more"
+            messagebox.showwarning("Files Not Renamed",
+                                   f"{len(skipped)} file(s) were not renamed because a file with the new name already exists:\n{shown}")
+
+    def rename_files(self, row_index, audio_file: AudioFile, camelot: bool = True):
+        """
+        Renames files in the selected folder based on metadata.
+        Raises FileExistsError, leaving the file as it is, if another file already has the new name.
+        """
+        # Silent or empty tracks get no key; leave them as they are rather than stop the batch.
+        if audio_file.key is None:
+            logger.warning("Not renaming file without a detected key: %s", audio_file.file_path)
+            return
         if camelot:
             key = audio_file.key.camelot.value
         else:
@@ -73,13 +163,18 @@ class TableWindow(tk.Toplevel):
             new_file_name = f"[{key}][{audio_file.BPM:.2f}] {audio_file.file_path.split('/')[-1]}"
         
         new_file_path = f"{audio_file.file_path.rsplit('/', 1)[0]}/{new_file_name}"
+        if new_file_path == audio_file.file_path:
+            return  # Already renamed, e.g. by an earlier click.
 
         try:
-            self.update_row_progress(audio_file, 50, "blue")
-            os.rename(audio_file.file_path, new_file_path)
+            self.update_row_progress(row_index, 50, "blue")
+            # Fails with FileExistsError rather than replacing a file that already has the name.
+            rename_noreplace(audio_file.file_path, new_file_path)
             logger.info("Renamed file: %s -> %s", audio_file.file_path, new_file_path)
             audio_file.file_path = new_file_path
-            self.update_row_progress(audio_file, 100, "blue")
+            self.update_row_progress(row_index, 100, "blue")
+        except FileExistsError:
+            raise
         except Exception as e:
             logger.error("Error renaming file: %s -> %s", audio_file.file_path, new_file_path)
             logger.error(e)
@@ -90,129 +185,232 @@ class TableWindow(tk.Toplevel):
 
     def process_files(self):
         """Process audio files in the selected folder"""
-        files = FolderHandler.get_audio_files(self.folder_path)
+        files = self.get_folder_files(self.folder_path)
         logger.debug("Found %d audio files in folder: %s", len(files), self.folder_path)
-        
-        max_threads = min(config.MAX_ANALYSIS_THREADS, len(files))
-        semaphore = threading.Semaphore(max_threads)
-        audio_files = []
-
-        def thread_target(file_path, idx):
-            with semaphore:
-                audio_files.append(self.analyze_file_gui(file_path, idx))
-                if len(audio_files) == len(files):
-                    self.after(0, lambda: self.rename_files_btn.config(state="normal", command=lambda: [self.rename_files(af) for af in audio_files]))
-        
+        # Results from a previous folder are ignored once the generation changes.
+        self._generation += 1
+        generation = self._generation
+        self._shutdown_executors()
+        self.rename_files_btn.config(state="disabled")
+        self._total = self._remaining = len(files)
+        self._update_overall_progress()
+        if not files:
+            return
+
+        # Spawned rather than forked: forking while the tag-reader threads hold locks (e.g. logging's)
+        # can deadlock the workers. Each worker builds its shared analyzer once, as it starts.
+        self.executor = ProcessPoolExecutor(max_workers=min(config.MAX_ANALYSIS_THREADS, len(files)),
+                                            mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=init_analysis_worker)
+        # Tag parsing is mostly I/O in mutagen, so threads overlap well and keep the UI responsive.
+        self.metadata_executor = ThreadPoolExecutor(max_workers=config.MAX_METADATA_THREADS)
         for idx, file_path in enumerate(files, start=1):
             self.add_table_row(idx, file_path)
-            threading.Thread(target=thread_target, args=(file_path, idx), daemon=True).start()
+            future = self.metadata_executor.submit(_load_audio_file, file_path)
+            future.add_done_callback(partial(self._post, self._on_metadata_loaded, generation, idx, file_path))
 
+    def _post(self, callback, *args):
+        """
+        Queues callback(*args) to run on the Tk main loop; safe to call from worker threads since
+        it doesn't touch Tk. Bound with partial as a future's done callback, the future is the
+        last argument.
+        """
+        self._ui_queue.put((callback, args))
 
-    def create_table(self):
-        """Creates the table for displaying audio file metadata."""
-        self.canvas = tk.Canvas(self)
-        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
-        self.scrollbar.pack(side="right", fill="y")
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+    def _drain_ui_queue(self):
+        """Runs every queued callback and draws pending row progress, then polls again. Runs on the Tk main loop."""
+        while True:
+            try:
+                callback, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("Error applying update from a worker")
+        if self._pending_progress:
+            self._flush_progress()
+        self._drain_id = self.after(UI_POLL_MS, self._drain_ui_queue)
+
+    def _on_metadata_loaded(self, generation, idx, file_path, future):
+        """
+        Fills in the row of a file whose tags were read, and submits it for analysis unless an
+        earlier result was found. Runs on the Tk main loop.
+        """
+        if generation != self._generation or future.cancelled():
+            return
+        try:
+            audio_file, analyzed = future.result()
+        except Exception as e:
+            logger.error("Error creating AudioFile for '%s': %s", file_path, e)
+            self._apply_row_error(idx)
+            self._finish_file(idx, None)
+            return
+        self._apply_row_metadata(idx, audio_file)
+        if analyzed:
+            self._apply_row_update(idx, audio_file.BPM, audio_file.key)
+            self._finish_file(idx, audio_file)
+            return
+        analysis = self.executor.submit(analyze_file, audio_file)
+        analysis.add_done_callback(partial(self._post, self._on_analysis_done, generation, idx, audio_file))
+
+    def _on_analysis_done(self, generation, idx, audio_file, future):
+        """Applies a finished analysis to its row. Runs on the Tk main loop."""
+        if generation != self._generation or future.cancelled():
+            return
+        self._finish_file(idx, self.analyze_file_gui(audio_file, idx, future))
 
-        self.table_frame = tk.Frame(self.canvas)
-        self.canvas.create_window((0, 0), window=self.table_frame, anchor="nw")
+    def _finish_file(self, row_index, audio_file):
+        """Records a file as done and enables renaming once the whole folder is done."""
+        if audio_file is not None:
+            self.row_files[row_index] = audio_file
+        self._remaining -= 1
+        self._update_overall_progress()
+        if self._remaining == 0:
+            self.rename_files_btn.config(state="normal")
 
-        headers = ["Index", "Genre", "Artist", "Album", "Title", "Progress", "BPM", "Key", "Camelot", "Player"]
-        for col, header in enumerate(headers):
-            lbl = tk.Label(self.table_frame, text=header, font=("Arial", 10, "bold"),
-                           borderwidth=1, relief="solid")
-            lbl.grid(row=0, column=col, sticky="nsew", padx=1, pady=1)
-        for col in range(len(headers)):
-            self.table_frame.grid_columnconfigure(col, weight=1)
-        self.row_widgets = {}
+    def _update_overall_progress(self):
+        """Shows how many of the folder's files are done on the overall progress bar and label."""
+        done = self._total - self._remaining
+        # Set the value rather than step(), which wraps back to 0 on reaching the maximum.
+        self.progress_bar.configure(value=done, maximum=max(1, self._total))
+        self.progress_label.config(text=f"{done} / {self._total} files complete")
+
+    def get_folder_files(self, folder_path):
+        """
+        Returns the audio files in folder_path, reusing the previous scan unless the
+        modification time of the folder or any of its subfolders has changed.
+        """
+        cached = self._file_list_cache.get(folder_path)
+        if cached and self._folders_unchanged(cached[0]):
+            logger.debug("Using cached file list for folder: %s", folder_path)
+            return cached[1]
+        folders = []
+        files = FolderHandler.get_audio_files(folder_path, folders)
+        try:
+            mtimes = {folder: os.stat(folder).st_mtime for folder in folders}
+        except OSError as e:
+            # A folder went away after it was scanned; use this list but don't cache it.
+            logger.debug("Not caching file list for folder %s: %s", folder_path, e)
+            self._file_list_cache.pop(folder_path, None)
+        else:
+            self._file_list_cache[folder_path] = (mtimes, files)
+        return files
 
-        self.table_frame.bind("<Configure>", self.on_frame_configure)
+    @staticmethod
+    def _folders_unchanged(mtimes):
+        """Returns True if every folder in mtimes still exists with the recorded modification time."""
+        try:
+            return all(os.stat(folder).st_mtime == mtime for folder, mtime in mtimes.items())
+        except OSError:
+            return False
+
+    def create_table(self):
+        """Creates the table for displaying audio file metadata."""
+        # A Treeview draws only the visible rows, so large folders don't need a widget per cell.
+        self.tree = ttk.Treeview(self, columns=TABLE_COLUMNS, show="headings")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
 
-    def on_frame_configure(self, event):
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        for column, header in zip(TABLE_COLUMNS, TABLE_HEADERS):
+            self.tree.heading(column, text=header)
+            self.tree.column(column, anchor="center")
+        for color in ("green", "blue", "red"):
+            self.tree.tag_configure(color, foreground=color)
+        self.tree.bind("<Double-1>", self.on_row_double_click)
+        self.row_items = {}
+        self.row_files = {}
 
     def _clear_table(self):
-        for widget in self.table_frame.winfo_children():
-            info = widget.grid_info()
-            if "row" in info and int(info["row"]) > 0:
-                widget.destroy()
-        self.row_widgets = {}
+        self.tree.delete(*self.tree.get_children())
+        self._pending_progress = {}
+        self.row_items = {}
+        self.row_files = {}
 
     def add_table_row(self, idx, file_path):
+        """Adds a placeholder row for file_path, filled in once its tags are read."""
+        self.row_items[idx] = self.tree.insert("", "end", values=(
+            idx, "", "", "", os.path.basename(file_path),
+            progress_text(0), "Loading…", "Loading…", "Loading…", ""))
+
+    def _apply_row_metadata(self, row_index, audio_file):
+        """Fills a row with audio_file's tags."""
+        item = self.row_items[row_index]
+        values = list(self.tree.item(item, "values"))
+        values[1:5] = [", ".join(audio_file.genre), audio_file.artist, audio_file.album, audio_file.title]
+        values[6:9] = ["Pending"] * 3
+        self.tree.item(item, values=values)
+
+    def analyze_file_gui(self, audio_file, row_index, future):
+        """
+        Collects a worker's analysis result into audio_file and updates its table row.
+        Returns audio_file, or None if the analysis failed.
+        """
         try:
-            from djsbf.dataclass.audio_file import AudioFile
-            audio_file = AudioFile(file_path)
-        except Exception as e:
-            logger.error("Error creating AudioFile for '%s': %s", file_path, e)
-            return
-        
-        idx_lbl = tk.Label(self.table_frame, text=str(idx), borderwidth=1, relief="solid")
-        idx_lbl.grid(row=idx, column=0, sticky="nsew", padx=1, pady=1)
-        genre_lbl = tk.Label(self.table_frame, 
-            text=audio_file.metadata.get("TCON", ["Unknown"])[0] 
-            if audio_file.metadata and "TCON" in audio_file.metadata
-            else audio_file.metadata.get("genre", ["Unknown"])[0] 
-            if audio_file.metadata and "genre" in audio_file.metadata
-            else "Unknown", borderwidth=1, relief="solid")
-        genre_lbl.grid(row=idx, column=1, sticky="nsew", padx=1, pady=1)
-        artist_lbl = tk.Label(self.table_frame, text=audio_file.artist, borderwidth=1, relief="solid")
-        artist_lbl.grid(row=idx, column=2, sticky="nsew", padx=1, pady=1)
-        album_lbl = tk.Label(self.table_frame, text=audio_file.album, borderwidth=1, relief="solid")
-        album_lbl.grid(row=idx, column=3, sticky="nsew", padx=1, pady=1)
-        title_lbl = tk.Label(self.table_frame, text=audio_file.title, borderwidth=1, relief="solid")
-        title_lbl.grid(row=idx, column=4, sticky="nsew", padx=1, pady=1)
-        progress_bar = ttk.Progressbar(self.table_frame, orient="horizontal", mode="determinate", maximum=100)
-        progress_bar.grid(row=idx, column=5, sticky="nsew", padx=1, pady=1)
-        bpm_lbl = tk.Label(self.table_frame, text="Pending", borderwidth=1, relief="solid")
-        bpm_lbl.grid(row=idx, column=6, sticky="nsew", padx=1, pady=1)
-        key_lbl = tk.Label(self.table_frame, text="Pending", borderwidth=1, relief="solid")
-        key_lbl.grid(row=idx, column=7, sticky="nsew", padx=1, pady=1)
-        camelot_lbl = tk.Label(self.table_frame, text="Pending", borderwidth=1, relief="solid")
-        camelot_lbl.grid(row=idx, column=8, sticky="nsew", padx=1, pady=1)
-        play_btn = tk.Button(self.table_frame, text="▶", state="disabled")
-        play_btn.grid(row=idx, column=9, sticky="nsew", padx=1, pady=1)
-        self.row_widgets[idx] = {
-            "progress_bar": progress_bar,
-            "bpm_label": bpm_lbl,
-            "key_label": key_lbl,
-            "camelot_label": camelot_lbl,
-            "player": play_btn
-        }
-
-    def analyze_file_gui(self, file_path, row_index):
-        try:
-            from djsbf.dataclass.audio_file import AudioFile
-            audio_file = AudioFile(file_path)
-            def progress_callback(percentage):
-                self.update_row_progress(row_index, percentage)
-            audio_file.analyze(progress_callback)
-            bpm = audio_file.BPM
-            key_info = audio_file.key
-            self.after(0, lambda: self.row_widgets[row_index]["bpm_label"].config(text=f"{bpm:.2f}"))
-            self.after(0, lambda: self.row_widgets[row_index]["key_label"].config(text=f"{key_info.tonic.value} {key_info.mode.value}"))
-            self.after(0, lambda: self.row_widgets[row_index]["camelot_label"].config(text=key_info.camelot.value))
-            self.after(0, lambda: self.row_widgets[row_index]["player"].config(state="normal", command=lambda af=audio_file: self.open_player(af)))
-            return audio_file
+            bpm, key_info = future.result()
         except Exception as e:
-            logger.error("Error analyzing file %s: %s", file_path, e)
-            self.after(0, lambda: self.row_widgets[row_index]["bpm_label"].config(text="Error"))
-            self.after(0, lambda: self.row_widgets[row_index]["key_label"].config(text="Error"))
-            self.after(0, lambda: self.row_widgets[row_index]["camelot_label"].config(text="Error"))
+            logger.error("Error analyzing file %s: %s", audio_file.file_path, e)
+            self._apply_row_error(row_index)
+            return None
+        audio_file.BPM = bpm
+        audio_file.key = key_info
+        self._apply_row_update(row_index, bpm, key_info)
+        return audio_file
+
+    def _apply_row_update(self, row_index, bpm, key_info):
+        """Fills a row with its analysis results in a single item update."""
+        item = self.row_items[row_index]
+        self._pending_progress.pop(row_index, None)
+        values = list(self.tree.item(item, "values"))
+        values[5:] = [
+            progress_text(100),
+            f"{bpm:.2f}",
+            f"{key_info.tonic.value} {key_info.mode.value}" if key_info else "Unknown",
+            key_info.camelot.value if key_info else "Unknown",
+            "▶",
+        ]
+        self.tree.item(item, values=values, tags=("green",))
+
+    def _apply_row_error(self, row_index):
+        """Marks a row whose analysis failed."""
+        item = self.row_items[row_index]
+        self._pending_progress.pop(row_index, None)
+        values = list(self.tree.item(item, "values"))
+        values[6:9] = ["Error"] * 3
+        self.tree.item(item, values=values, tags=("red",))
 
     def update_row_progress(self, row_index, value, color="green"):
-        if row_index in self.row_widgets:
-            self.after(0, lambda: self.row_widgets[row_index]["progress_bar"].configure(value=value))
+        """
+        Queues a progress update for a row; the next UI poll draws the latest one per row.
+        Must be called on the Tk main loop. Worker threads report progress through _post,
+        which never touches Tk, so they never wait on the GUI.
+        """
+        if row_index in self.row_items:
+            self._pending_progress[row_index] = (value, color)
+
+    def _flush_progress(self):
+        """Draws the queued progress updates. Runs on the Tk main loop."""
+        pending, self._pending_progress = self._pending_progress, {}
+        for row_index, (value, color) in pending.items():
+            item = self.row_items.get(row_index)
+            if item is None:
+                continue
+            self.tree.set(item, "progress", progress_text(value))
             if color:
-                self.after(0, lambda: self.row_widgets[row_index]["progress_bar"].configure(style=f"{color}.Horizontal.TProgressbar"))
-                style = ttk.Style()
-                style.configure(f"{color}.Horizontal.TProgressbar", troughcolor='white', background=color)
+                self.tree.item(item, tags=(color,))
+
+    def on_row_double_click(self, event):
+        """Opens the player for the double-clicked row."""
+        item = self.tree.identify_row(event.y)
+        if item:
+            row_index = int(self.tree.set(item, "index"))
+            self.open_player(self.row_files.get(row_index))
 
     def open_player(self, audio_file):
-        from djsbf.gui.player_window import PlayerWindow
         if audio_file is None:
-            logger.error("Cannot open player for file %s: Analysis not done.", audio_file.file_path)
+            logger.error("Cannot open player: Analysis not done.")
             messagebox.showwarning("Analysis Incomplete", "Please wait until the analysis is complete before playing the file.")
         else:
-            PlayerWindow(self, audio_file)
\ No newline at end of file
+            PlayerWindow(self, audio_file)
@@ -8,7 +8,6 @@ import argparse
 import sys
 
 from djsbf.dataclass.audio_file import AudioFile
-from djsbf.analysis.analyzer import AudioAnalyzer
 import djsbf.config as config
 from djsbf.utils.logger import get_logger
 
@@ -19,6 +18,8 @@ def run_cli(audio_filepath):
     Run the application in command-line mode with the provided audio file.
     """
     logger.info("Starting CLI analysis for file: %s", audio_filepath)
+    # Import here so GUI startup doesn't load librosa before a folder is opened
+    from djsbf.analysis.analyzer import get_analyzer
     try:
         # Create an AudioFile instance and load the file using the configured sample rate
         audio_file = AudioFile(audio_filepath)
@@ -26,13 +27,12 @@ def run_cli(audio_filepath):
         logger.debug("Audio file loaded successfully.")
         
         # Run the analysis using AudioAnalyzer
-        analyzer = AudioAnalyzer()
-        results = analyzer.analyze(audio_file)
+        results = get_analyzer().analyze(audio_file)
         logger.info("Audio analysis completed.")
         
         # Print the results to the console
         print("Audio Analysis Results:")
-        for key, value in results.items():
+        for key, value in vars(results).items():
             print(f"{key}: {value}")
     except Exception as e:
         logger.exception("Error processing file '%s': %s", audio_filepath, e)
@@ -46,7 +46,6 @@ def run_gui():
     try:
         # Import here to avoid dependency issues if someone runs CLI only
         from djsbf.gui.main_window import MainWindow
-        import tkinter as tk
 
         app = MainWindow()
         app.mainloop()
@@ -0,0 +1,32 @@
+"""
+Numba kernels for the playback hot paths.
+They compile on their first call (and are cached on disk), not at import, so opening the
+player pays no JIT time until the BPM is first changed.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _resample_linear(src, rate, out, to_int):
+    last = src.shape[0] - 1
+    for i in prange(out.shape[0]):
+        pos = i * rate
+        j = int(pos)
+        if j >= last:
+            out[i] = src[last]
+        else:
+            frac = pos - j
+            value = src[j] * (1.0 - frac) + src[j + 1] * frac
+            out[i] = round(value) if to_int else value
+
+
+def resample_linear(src, rate, out):
+    """
+    Fills out with src played back rate times faster, linearly interpolating between
+    neighbouring samples. Positions past the end of src repeat its last sample.
+    Interpolated values are rounded to the nearest integer only when out holds integers
+    (e.g. int16 PCM); float output keeps them as they are.
+    """
+    _resample_linear(src, rate, out, np.issubdtype(out.dtype, np.integer))
@@ -5,10 +5,12 @@ Handles resampling (speed changes), time-stretching, and BPM validation.
 
 import numpy as np
 import logging
-from djsbf.analysis.bpm_detector import BPMDetector
+from ._kernels import resample_linear
 
 logger = logging.getLogger(__name__)
 
+INT16_BLOCK_SIZE = 1 << 16  # Samples converted per scratch block in to_int16
+
 class AudioProcessor:
     @staticmethod
     def get_valid_bpm(audio_file):
@@ -20,6 +22,8 @@ class AudioProcessor:
             logger.debug("Using provided BPM: %s", audio_file.BPM)
             return audio_file.BPM
         try:
+            # Imported here: the detector pulls in librosa, which the player otherwise never needs.
+            from djsbf.analysis.bpm_detector import BPMDetector
             detector = BPMDetector()
             # detector.detect_bpm is assumed to return an array-like value.
             bpm = detector.detect_bpm(audio_file.audio_data, audio_file.sample_rate)
@@ -29,19 +33,48 @@ class AudioProcessor:
             logger.error("Error in BPM detection: %s", e)
             return 120
 
+    @staticmethod
+    def to_int16(audio, block_size=INT16_BLOCK_SIZE):
+        """
+        Quantizes float audio in [-1, 1] to int16 PCM, halving its memory for playback and
+        display; clipping guards against samples slightly out of range.
+        Works through one small float32 scratch block at a time, so converting a whole track
+        doesn't allocate full-length float temporaries next to the float source.
+        """
+        out = np.empty(len(audio), dtype=np.int16)
+        scratch = np.empty(min(block_size, len(audio)), dtype=np.float32)
+        for start in range(0, len(audio), block_size):
+            block = audio[start:start + block_size]
+            buf = scratch[:len(block)]
+            np.multiply(block, 32767, out=buf)
+            np.clip(buf, -32767, 32767, out=buf)
+            out[start:start + len(block)] = buf
+        return out
+
     @staticmethod
     def apply_speed_change(original_audio, current_rate):
         """
-        Applies a simple resampling-based speed change (quality-compromised but CPU-friendly).
+        Applies a simple resampling-based speed change (linear interpolation, so pitch follows
+        speed), computed in parallel by a Numba kernel.
         If current_rate is 1.0, returns the original audio.
         """
         if current_rate == 1.0:
             logger.debug("No speed change applied, current_rate equals 1.0")
             return original_audio
+        modified_audio = np.empty(int(len(original_audio) / current_rate), dtype=original_audio.dtype)
+        AudioProcessor.apply_speed_change_into(original_audio, current_rate, modified_audio)
+        return modified_audio
+
+    @staticmethod
+    def apply_speed_change_into(original_audio, current_rate, out):
+        """
+        Like apply_speed_change, but writes into the preallocated array out, which must hold at
+        least len(original_audio) / current_rate samples. Returns the number of samples written.
+        """
         new_length = int(len(original_audio) / current_rate)
-        indices = np.clip(np.arange(new_length) * current_rate, 0, len(original_audio) - 1).astype(int)
         logger.debug("Applying speed change: current_rate=%s, new_length=%s", current_rate, new_length)
-        return original_audio[indices]
+        resample_linear(original_audio, current_rate, out[:new_length])
+        return new_length
 
     @staticmethod
     def process_stretched_audio(audio, sample_rate, current_rate, time_stretcher):
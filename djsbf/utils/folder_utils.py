@@ -1,29 +1,160 @@
+import ctypes
+import errno
 import os
 import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+
+import djsbf.config as config
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.ogg', '.m4a', '.wma')
+
+# On Linux, visiting entries in inode order follows the on-disk inode table, so the stat and
+# tag reads that follow seek less on spinning disks. Inode numbers mean nothing elsewhere.
+SORT_BY_INODE = sys.platform.startswith("linux")
+
+
+# renameat2(2) flag asking the kernel to fail with EEXIST instead of replacing the target.
+_RENAME_NOREPLACE = 1
+_AT_FDCWD = -100
+
+
+def _load_renameat2():
+    """Returns glibc's renameat2 (2.28+), or None on other platforms and C libraries."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    renameat2.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint)
+    renameat2.restype = ctypes.c_int
+    return renameat2
+
+
+_renameat2 = _load_renameat2()
+
+
+def rename_noreplace(src, dst):
+    """
+    Renames src to dst, raising FileExistsError instead of replacing an existing dst.
+    On Linux the kernel checks and renames in one atomic renameat2 call; Windows' rename
+    already refuses existing targets; elsewhere dst is checked just before renaming.
+    """
+    if _renameat2 is not None:
+        if _renameat2(_AT_FDCWD, os.fsencode(src), _AT_FDCWD, os.fsencode(dst), _RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        # EINVAL/ENOSYS: the filesystem or kernel doesn't support the flag; use the fallback.
+        if err not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(err, os.strerror(err), src, None, dst)
+    if sys.platform != "win32" and os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), src, None, dst)
+    os.rename(src, dst)
+
+
+def _scan_dir(folder, extensions, skip_hidden=False):
+    """
+    Lists one directory with os.scandir, which gets the entry type without an extra stat.
+    Returns (subdirectories, files whose name ends with one of extensions), or None if the
+    directory can't be read. With skip_hidden, dot entries (.Trash, .git, AppleDouble ._
+    files) are left out, so hidden trees are never descended into.
+    """
+    try:
+        entries = os.scandir(folder)
+    except OSError:
+        return None
+    dirs, files = [], []
+    with entries:
+        if SORT_BY_INODE:
+            # DirEntry.inode() comes from the directory listing itself, so sorting costs no syscalls.
+            entries = sorted(entries, key=os.DirEntry.inode)
+        for entry in entries:
+            if skip_hidden and entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif entry.name.lower().endswith(extensions):
+                files.append(entry.path)
+    return dirs, files
+
+
+def _iter_files(folder_path, extensions, folders=None, workers=1, skip_hidden=False):
+    """
+    Recursively yields the files in folder_path whose name ends with one of extensions
+    (lowercase, with the dot), a directory at a time as the scan goes. The tree is listed one
+    level at a time; with workers > 1 the directories of a level are listed concurrently,
+    which hides scandir latency on network shares (os.scandir releases the GIL).
+    Unreadable directories are skipped, as os.walk does, and so are hidden entries if
+    skip_hidden is True. If folders is a list, every directory scanned is appended to it.
+    """
+    level = [folder_path]
+    scan = partial(_scan_dir, extensions=extensions, skip_hidden=skip_hidden)
+    with ThreadPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as pool:
+        while level:
+            results = pool.map(scan, level) if pool else map(scan, level)
+            next_level = []
+            for folder, result in zip(level, results):
+                if result is None:
+                    continue
+                if folders is not None:
+                    folders.append(folder)
+                next_level.extend(result[0])
+                yield from result[1]
+            level = next_level
+
+
+def _find_files(folder_path, extensions, folders=None, workers=1, skip_hidden=False):
+    """Returns the list of files _iter_files yields."""
+    return list(_iter_files(folder_path, extensions, folders, workers, skip_hidden))
+
+
+def _numbered_names(folder_path, new_name):
+    """
+    Pairs every file under folder_path with a new_name_NNNN path in the same folder, keeping
+    its extension. Numbers already used by a file name in the folder, hidden ones included,
+    are skipped.
+    """
+    by_folder = {}
+    for path in _find_files(folder_path, ""):  # Every name ends with "".
+        by_folder.setdefault(os.path.dirname(path), []).append(path)
+    pairs = []
+    for folder, paths in by_folder.items():
+        taken = {os.path.basename(path) for path in paths}
+        number = 0
+        for path in sorted(paths):
+            ext = os.path.splitext(path)[1]
+            while True:
+                name = f"{new_name}_{number:04d}{ext}"
+                number += 1
+                if name not in taken:
+                    break
+            pairs.append((path, os.path.join(folder, name)))
+    return pairs
+
 
 class FolderHandler:
     @staticmethod
-    def get_audio_files(folder_path):
-        allowed_extensions = {'.mp3', '.wav', '.flac', '.ogg', '.m4a', '.wma'}
-        files = []
-        for root, _, filenames in os.walk(folder_path):
-            for f in filenames:
-                if os.path.splitext(f)[1].lower() in allowed_extensions:
-                    files.append(os.path.join(root, f))
-        return files
+    def get_audio_files(folder_path, folders=None, workers=config.MAX_SCAN_THREADS, skip_hidden=True):
+        return _find_files(folder_path, AUDIO_EXTENSIONS, folders, workers, skip_hidden)
     
     @staticmethod
-    def rename_files(folder_path, new_name):
-        for root, _, filenames in os.walk(folder_path):
-            for f in filenames:
-                os.rename(os.path.join(root, f), os.path.join(root, new_name))
+    def rename_files(folder_path, new_name, workers=config.MAX_SCAN_THREADS):
+        """
+        Renames every file under folder_path to new_name_NNNN, numbered per folder and keeping
+        its extension, so the files no longer overwrite one another. New names never match an
+        existing one, so the renames are independent and run on up to workers threads.
+        A file created under one of the new names meanwhile is never overwritten: that
+        rename fails with FileExistsError instead.
+        """
+        pairs = _numbered_names(folder_path, new_name)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Consume the results so the first failed rename is raised here.
+            list(pool.map(lambda pair: rename_noreplace(*pair), pairs))
     
     @staticmethod
     def get_random_file(folder_path, file_extension):
-        files = []
-        for root, _, filenames in os.walk(folder_path):
-            for f in filenames:
-                if os.path.splitext(f)[1].lower() == file_extension.lower():
-                    print("Found file: %s", f)
-                    files.append(os.path.join(root, f))
-        return random.choice(files) if files else None
\ No newline at end of file
+        files = _find_files(folder_path, file_extension.lower())
+        return random.choice(files) if files else None
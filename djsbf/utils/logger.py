@@ -1,32 +1,47 @@
+import atexit
 import logging
+import multiprocessing
+import queue
+from logging.handlers import QueueHandler, QueueListener
 import djsbf.config as config
 
+# Set the log level from configuration (default to DEBUG if missing)
+_log_level = getattr(logging, config.LOG_LEVEL.upper(), logging.DEBUG)
+
+# A single console handler, written to by one background thread in the main process. Loggers
+# only enqueue their records, so threads logging at once (tag readers, renames) never wait on
+# the console.
+_console = logging.StreamHandler()
+_console.setLevel(_log_level)
+_console.setFormatter(logging.Formatter(
+    '%(asctime)s | %(name)s | %(levelname)s | %(message)s'
+))
+if multiprocessing.parent_process() is None:
+    _queue_handler = QueueHandler(queue.SimpleQueue())
+    _listener = QueueListener(_queue_handler.queue, _console, respect_handler_level=True)
+    _listener.start()
+    # Stopping the listener writes out any records still queued at exit.
+    atexit.register(_listener.stop)
+    _handler = _queue_handler
+else:
+    # Pool workers end with os._exit, which skips atexit hooks, so records queued for a
+    # listener thread there could be lost. Workers write to the console directly instead.
+    _handler = _console
+
 def get_logger(name):
     """
     Creates and returns a logger with the given name.
     Log level and format are based on the settings in config.py.
     """
     logger = logging.getLogger(name)
-    
+
     # If the logger already has handlers, return it to avoid duplicate logs.
     if logger.handlers:
         return logger
 
-    # Set the log level from configuration (default to DEBUG if missing)
-    log_level = getattr(logging, config.LOG_LEVEL.upper(), logging.DEBUG)
-    logger.setLevel(log_level)
-
-    # Create stream handler (console) with the same log level
-    ch = logging.StreamHandler()
-    ch.setLevel(log_level)
-
-    # Create formatter and attach it to the handler
-    formatter = logging.Formatter(
-        '%(asctime)s | %(name)s | %(levelname)s | %(message)s'
-    )
-    ch.setFormatter(formatter)
+    logger.setLevel(_log_level)
 
-    # Add the handler to the logger
-    logger.addHandler(ch)
+    # The shared queue in the main process (the listener thread prints it), the console in workers.
+    logger.addHandler(_handler)
 
     return logger
@@ -1,18 +1,27 @@
 from djsbf.dataclass.audio_file import AudioFile
 import os
+from djsbf.utils.folder_utils import rename_noreplace
 from djsbf.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class RenamingUtils:
-    def rename_file(audio_file: AudioFile, ):
+    @staticmethod
+    def rename_file(audio_file: AudioFile):
         """
-        Renames the file based on its metadata.
+        Renames the file based on its metadata, within its folder.
+        Raises ValueError if the file has no usable title, and FileExistsError if another
+        file already has the new name; the file is left untouched in both cases.
         """
-        logger.info("Renaming file: %s", audio_file._file_path)
-        file_extension = os.path.splitext(audio_file._file_path)[1]
-
-        new_file_path = audio_file.metadata["title"][0] + ".mp3"
-        os.rename(audio_file._file_path, new_file_path)
-        audio_file._file_path = new_file_path
-        logger.info("File renamed to: %s", new_file_path)
\ No newline at end of file
+        if audio_file.safe_target_name is None:
+            raise ValueError(f"{audio_file.file_path} has no title to rename it by")
+        # Stay in the file's own folder so the rename is a metadata-only operation.
+        folder = os.path.dirname(audio_file.file_path)
+        new_file_path = os.path.join(folder, audio_file.safe_target_name).replace("\\", "/")
+        if new_file_path == audio_file.file_path:
+            return
+        # Fails with FileExistsError rather than replacing a file that already has the name.
+        rename_noreplace(audio_file.file_path, new_file_path)
+        # One record per rename, as the table's renamer logs them.
+        logger.info("Renamed file: %s -> %s", audio_file.file_path, new_file_path)
+        audio_file.file_path = new_file_path
\ No newline at end of file
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+import djsbf.config as config
+from djsbf.analysis._kernels import key_corrs
+from djsbf.analysis.analyzer import AnalysisContext, prepare_audio
+from djsbf.analysis.key_detector import MAJOR_TEMPLATES, MINOR_TEMPLATES
+
+
+@pytest.fixture(scope="module")
+def chord(tmp_path_factory):
+    """Twelve seconds of an A major triad at 44.1 kHz, pulsed at 120 BPM."""
+    sr = 44100
+    t = np.arange(12 * sr) / sr
+    y = sum(np.sin(2 * np.pi * f * t) for f in (220.0, 277.18, 329.63))
+    y *= 0.2 * (1 + np.sign(np.sin(2 * np.pi * 2 * t))) / 2
+    path = str(tmp_path_factory.mktemp("audio") / "chord.wav")
+    sf.write(path, y.astype(np.float32), sr)
+    return path, y.astype(np.float32), sr
+
+
+@pytest.mark.parametrize("method", ["cqt", "stft"])
+def test_stream_matches_whole_window(chord, monkeypatch, method):
+    monkeypatch.setattr(config, "KEY_CHROMA_METHOD", method)
+    path, y, sr = chord
+    # Blocks much shorter than the window put several seams in it.
+    streamed = AnalysisContext.from_stream(path, block_duration=1.5)
+    whole = AnalysisContext.from_audio(*prepare_audio(y, sr))
+    scores = key_corrs(streamed.chroma, MAJOR_TEMPLATES, MINOR_TEMPLATES)
+    expected = key_corrs(whole.chroma, MAJOR_TEMPLATES, MINOR_TEMPLATES)
+    np.testing.assert_allclose(scores, expected, atol=0.02)
+    assert np.argmax(scores) == np.argmax(expected)
+    # center=False drops the padded edge frames; the rest line up.
+    assert abs(len(streamed.onset_env) - len(whole.onset_env)) <= 4
+
+
+def test_window_shorter_than_a_frame(chord):
+    path, _, _ = chord
+    context = AnalysisContext.from_stream(path, duration=0.01)
+    assert context.chroma.shape[0] == 12
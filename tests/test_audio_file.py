@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import soundfile as sf
+from mutagen.id3 import PRIV, TBPM, TKEY
+from mutagen.wave import WAVE
+
+import djsbf.config as config
+from djsbf.dataclass.audio_file import AudioFile
+from djsbf.dataclass.key import Key
+from djsbf.enums import Mode, Tonic
+
+
+@pytest.fixture
+def wav(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ANALYSIS_CACHE_PATH", str(tmp_path / "cache" / "analysis.sqlite"))
+    path = str(tmp_path / "track.wav")
+    sf.write(path, np.zeros(1000, dtype=np.float32), 44100)
+    tags = WAVE(path)
+    tags.add_tags()
+    tags.tags.add(TBPM(encoding=3, text="128"))
+    tags.tags.add(TKEY(encoding=3, text="8A"))
+    tags.save()
+    return path
+
+
+def _mark_traktor(path):
+    tags = WAVE(path)
+    tags.tags.add(PRIV(owner="TRAKTOR4", data=b"\x00"))
+    tags.save()
+
+
+def test_traktor_frame_is_detected(wav):
+    assert not AudioFile(wav).traktor_analysis
+    _mark_traktor(wav)
+    assert AudioFile(wav).traktor_analysis
+
+
+def test_traktor_tags_skip_analysis(wav):
+    _mark_traktor(wav)
+    audio_file = AudioFile(wav)
+    assert audio_file.load_previous_analysis()
+    assert audio_file.BPM == 128.0
+    assert audio_file.key == Key(Tonic.A, Mode.MINOR)
+
+
+def test_tags_without_traktor_frame_are_not_trusted(wav):
+    assert not AudioFile(wav).load_previous_analysis()
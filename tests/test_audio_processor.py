@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from djsbf.player.audio_processor import AudioProcessor
+
+
+def _reference(audio, rate):
+    positions = np.arange(int(len(audio) / rate)) * rate
+    return np.interp(positions, np.arange(len(audio)), audio)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("rate", [0.7, 1.5])
+def test_speed_change_keeps_float_samples(dtype, rate):
+    audio = np.sin(np.linspace(0, 20, 1000)).astype(dtype)
+    stretched = AudioProcessor.apply_speed_change(audio, rate)
+    assert stretched.dtype == dtype
+    np.testing.assert_allclose(stretched, _reference(audio, rate), atol=1e-6)
+
+
+@pytest.mark.parametrize("rate", [0.7, 1.5])
+def test_speed_change_rounds_int16_samples(rate):
+    audio = (np.sin(np.linspace(0, 20, 1000)) * 32767).astype(np.int16)
+    stretched = AudioProcessor.apply_speed_change(audio, rate)
+    assert stretched.dtype == np.int16
+    # fastmath may tip an exact .5 either way.
+    assert np.abs(stretched - np.round(_reference(audio, rate))).max() <= 1
+
+
+def test_speed_change_into_fills_only_the_new_length():
+    audio = np.arange(100, dtype=np.int16)
+    out = np.full(100, -1, dtype=np.int16)
+    length = AudioProcessor.apply_speed_change_into(audio, 2.0, out)
+    assert length == 50
+    np.testing.assert_array_equal(out[:50], np.arange(0, 100, 2))
+    assert (out[50:] == -1).all()
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import pytest
+
+import djsbf.config as config
+from djsbf.analysis import cache
+from djsbf.dataclass.key import Key
+from djsbf.enums import Mode, Tonic
+
+
+@pytest.fixture
+def track(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ANALYSIS_CACHE_PATH", str(tmp_path / "cache" / "analysis.sqlite"))
+    path = tmp_path / "track.mp3"
+    path.write_bytes(b"audio")
+    return str(path)
+
+
+KEY = Key(Tonic.A, Mode.MINOR)
+
+
+def test_hit_for_unchanged_file(track):
+    cache.put(track, os.stat(track), 124.0, KEY)
+    assert cache.get(track, os.stat(track)) == (124.0, KEY)
+
+
+def test_miss_for_unknown_file(track):
+    assert cache.get(track, os.stat(track)) is None
+
+
+def test_result_without_key(track):
+    cache.put(track, os.stat(track), 90.5, None)
+    assert cache.get(track, os.stat(track)) == (90.5, None)
+
+
+def test_mtime_change_invalidates(track):
+    stat = os.stat(track)
+    cache.put(track, stat, 124.0, KEY)
+    os.utime(track, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get(track, os.stat(track)) is None
+
+
+def test_size_change_invalidates(track):
+    stat = os.stat(track)
+    cache.put(track, stat, 124.0, KEY)
+    with open(track, "ab") as f:
+        f.write(b"more")
+    # Keep the old mtime so only the size differs.
+    os.utime(track, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.get(track, os.stat(track)) is None
+
+
+def test_put_replaces_previous_entry(track):
+    cache.put(track, os.stat(track), 124.0, KEY)
+    cache.put(track, os.stat(track), 62.0, Key(Tonic.C, Mode.MAJOR))
+    assert cache.get(track, os.stat(track)) == (62.0, Key(Tonic.C, Mode.MAJOR))
+
+
+@pytest.mark.parametrize("setting, value", [("KEY_CHROMA_METHOD", "other"), ("ANALYSIS_WINDOW_S", 5)])
+def test_settings_change_invalidates(track, monkeypatch, setting, value):
+    cache.put(track, os.stat(track), 124.0, KEY)
+    monkeypatch.setattr(config, setting, value)
+    assert cache.get(track, os.stat(track)) is None
+
+
+def test_version_bump_invalidates(track, monkeypatch):
+    cache.put(track, os.stat(track), 124.0, KEY)
+    monkeypatch.setattr(cache, "ANALYSIS_VERSION", cache.ANALYSIS_VERSION + 1)
+    assert cache.get(track, os.stat(track)) is None
+
+
+def test_connection_is_reused_within_a_thread(track):
+    assert cache._connect() is cache._connect()
+
+
+def test_connections_are_per_thread(track):
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        other = pool.submit(cache._connect).result()
+    assert other is not cache._connect()
+
+
+def test_old_layout_is_rebuilt(tmp_path, monkeypatch):
+    db = tmp_path / "old.sqlite"
+    with closing(sqlite3.connect(db)) as conn, conn:
+        conn.execute("CREATE TABLE analysis (path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, "
+                     "bpm REAL, key_tonic TEXT, key_mode TEXT, camelot TEXT)")
+    monkeypatch.setattr(config, "ANALYSIS_CACHE_PATH", str(db))
+    track = tmp_path / "track.mp3"
+    track.write_bytes(b"audio")
+    cache.put(str(track), os.stat(track), 124.0, KEY)
+    assert cache.get(str(track), os.stat(track)) == (124.0, KEY)
@@ -0,0 +1,112 @@
+import errno
+import os
+
+import pytest
+
+from djsbf.utils import folder_utils
+from djsbf.utils.folder_utils import FolderHandler, _numbered_names, rename_noreplace
+
+
+def _write(path, data):
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.fixture
+def pair(tmp_path):
+    src, dst = tmp_path / "src.mp3", tmp_path / "dst.mp3"
+    _write(src, "src")
+    _write(dst, "dst")
+    return str(src), str(dst)
+
+
+def test_rename_noreplace_moves_file(tmp_path):
+    src, dst = tmp_path / "src.mp3", tmp_path / "dst.mp3"
+    _write(src, "src")
+    rename_noreplace(str(src), str(dst))
+    assert not src.exists()
+    assert _read(dst) == "src"
+
+
+def test_rename_noreplace_refuses_existing_target(pair):
+    src, dst = pair
+    with pytest.raises(FileExistsError):
+        rename_noreplace(src, dst)
+    assert _read(src) == "src"
+    assert _read(dst) == "dst"
+
+
+def test_fallback_without_renameat2_refuses_existing_target(pair, monkeypatch):
+    monkeypatch.setattr(folder_utils, "_renameat2", None)
+    src, dst = pair
+    with pytest.raises(FileExistsError):
+        rename_noreplace(src, dst)
+    assert _read(dst) == "dst"
+
+
+@pytest.mark.parametrize("err", [errno.EINVAL, errno.ENOSYS])
+def test_unsupported_flag_falls_back(pair, tmp_path, monkeypatch, err):
+    # The filesystem or kernel rejecting RENAME_NOREPLACE must not turn into a plain replace.
+    monkeypatch.setattr(folder_utils, "_renameat2", lambda *args: -1)
+    monkeypatch.setattr(folder_utils.ctypes, "get_errno", lambda: err)
+    src, dst = pair
+    with pytest.raises(FileExistsError):
+        rename_noreplace(src, dst)
+    assert _read(dst) == "dst"
+    free = str(tmp_path / "free.mp3")
+    rename_noreplace(src, free)
+    assert _read(free) == "src"
+
+
+def test_other_errors_are_raised(pair, monkeypatch):
+    monkeypatch.setattr(folder_utils, "_renameat2", lambda *args: -1)
+    monkeypatch.setattr(folder_utils.ctypes, "get_errno", lambda: errno.EACCES)
+    src, dst = pair
+    with pytest.raises(PermissionError):
+        rename_noreplace(src, dst)
+
+
+def test_numbered_names_skip_existing_names(tmp_path):
+    for name in ("a.mp3", "b.wav", "song_0001.mp3", ".song_0002.wav", "song_0002.mp3"):
+        _write(tmp_path / name, name)
+    pairs = dict(_numbered_names(str(tmp_path), "song"))
+    new_names = [os.path.basename(path) for path in pairs.values()]
+    assert len(set(new_names)) == len(new_names)
+    existing = {"a.mp3", "b.wav", "song_0001.mp3", ".song_0002.wav", "song_0002.mp3"}
+    for src, dst in pairs.items():
+        name = os.path.basename(dst)
+        # Only a file's own current name may be reused, and then it is left where it is.
+        assert name not in existing or dst == src
+        assert os.path.splitext(dst)[1] == os.path.splitext(src)[1]
+
+
+def test_numbered_names_count_hidden_files(tmp_path):
+    _write(tmp_path / ".song_0000.mp3", "hidden")
+    _write(tmp_path / "a.mp3", "a")
+    pairs = dict(_numbered_names(str(tmp_path), "song"))
+    assert pairs[str(tmp_path / "a.mp3")] != str(tmp_path / ".song_0000.mp3")
+
+
+def test_rename_files_numbers_each_folder(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    for path in (tmp_path / "a.mp3", tmp_path / "b.mp3", sub / "c.flac"):
+        _write(path, path.name)
+    FolderHandler.rename_files(str(tmp_path), "track")
+    assert sorted(os.listdir(tmp_path)) == ["sub", "track_0000.mp3", "track_0001.mp3"]
+    assert os.listdir(sub) == ["track_0000.flac"]
+    assert {_read(tmp_path / name) for name in ("track_0000.mp3", "track_0001.mp3")} == {"a.mp3", "b.mp3"}
+
+
+def test_get_audio_files_skips_hidden_entries(tmp_path):
+    hidden = tmp_path / ".Trash"
+    hidden.mkdir()
+    for path in (tmp_path / "a.MP3", tmp_path / "._a.mp3", tmp_path / "notes.txt", hidden / "b.mp3"):
+        _write(path, "")
+    assert FolderHandler.get_audio_files(str(tmp_path)) == [str(tmp_path / "a.MP3")]
+    assert len(FolderHandler.get_audio_files(str(tmp_path), skip_hidden=False)) == 3
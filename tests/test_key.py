@@ -0,0 +1,41 @@
+import pytest
+
+from djsbf.dataclass.key import Key
+from djsbf.enums import CamelotKey, Mode, Tonic
+
+ALL_KEYS = [Key(tonic, mode) for tonic in Tonic for mode in Mode]
+
+
+@pytest.mark.parametrize("key", ALL_KEYS, ids=str)
+def test_camelot_round_trip(key):
+    assert Key.from_string(key.camelot.value) == key
+
+
+@pytest.mark.parametrize("key", ALL_KEYS, ids=str)
+def test_musical_round_trip(key):
+    suffix = "m" if key.mode == Mode.MINOR else ""
+    assert Key.from_string(key.tonic.value + suffix) == key
+    assert Key.from_string(f"{key.tonic.value} {key.mode.value}") == key
+
+
+def test_camelot_codes_are_unique():
+    assert len({key.camelot for key in ALL_KEYS}) == len(CamelotKey) == 24
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("8A", Key(Tonic.A, Mode.MINOR)),
+    ("08b", Key(Tonic.C, Mode.MAJOR)),
+    ("1m", Key(Tonic.A, Mode.MINOR)),
+    ("1d", Key(Tonic.C, Mode.MAJOR)),
+    ("Ebm", Key(Tonic.D_SHARP, Mode.MINOR)),
+    ("Db", Key(Tonic.C_SHARP, Mode.MAJOR)),
+    ("F# minor", Key(Tonic.F_SHARP, Mode.MINOR)),
+    ("  Cmaj ", Key(Tonic.C, Mode.MAJOR)),
+])
+def test_from_string_notations(text, expected):
+    assert Key.from_string(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "13A", "0B", "H", "8C", "C mixolydian"])
+def test_from_string_rejects_unknown_text(text):
+    assert Key.from_string(text) is None
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from djsbf.analysis._kernels import key_corrs
+from djsbf.analysis.key_detector import MAJOR_PROFILE, MAJOR_TEMPLATES, MINOR_PROFILE, MINOR_TEMPLATES
+
+
+def _reference(chroma):
+    """Pearson correlation of the time-summed chroma with every rotation of each profile."""
+    summed = chroma.sum(axis=1, dtype=np.float64)
+    return np.array([np.corrcoef(summed, np.roll(profile, k))[0, 1]
+                     for profile in (MAJOR_PROFILE, MINOR_PROFILE) for k in range(12)])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_corrcoef(seed):
+    chroma = np.random.default_rng(seed).random((12, 200), dtype=np.float32)
+    scores = key_corrs(chroma, MAJOR_TEMPLATES, MINOR_TEMPLATES)
+    assert scores.shape == (24,)
+    np.testing.assert_allclose(scores, _reference(chroma), atol=1e-5)
+
+
+def test_profile_scores_its_own_key_highest():
+    # A chromagram shaped like D minor's profile must correlate best with D minor.
+    chroma = np.tile(np.roll(MINOR_PROFILE, 2), (50, 1)).T.astype(np.float32)
+    scores = key_corrs(chroma, MAJOR_TEMPLATES, MINOR_TEMPLATES)
+    assert int(np.argmax(scores)) == 12 + 2
+    assert scores[14] == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.parametrize("chroma", [np.zeros((12, 10), np.float32), np.ones((12, 10), np.float32)])
+def test_flat_chroma_has_no_scores(chroma):
+    assert key_corrs(chroma, MAJOR_TEMPLATES, MINOR_TEMPLATES).size == 0